@@ -0,0 +1,147 @@
+"""Backfill entry snapshots for trades that have none.
+
+Trades recorded before migration 002, or whose background snapshot thread
+died, have no stored market snapshot. This job streams them in keyset-paged
+chunks ordered by (symbol, id), so each symbol's trades arrive together and its
+K-lines are fetched once per chunk through the shared provider chain. Snapshots
+are written back with one batched UPDATE per chunk, and the last processed key
+is checkpointed so an interrupted run resumes where it stopped.
+
+    python -m agent_runtime.backfill [--chunk-size 500] [--user USER_ID] [--restart]
+
+Trades without market data keep a NULL snapshot; the checkpoint moves past
+them, and --restart rescans from the beginning.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from sqlalchemy import select, tuple_, update
+
+from app.config import get_database_url
+from app.db import SessionLocal, TradeORM, make_engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_CHECKPOINT = Path(__file__).resolve().parent.parent / "data" / "backfill_checkpoint.json"
+
+
+def backfill_snapshots(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint_path: Path = DEFAULT_CHECKPOINT,
+    user_id: str | None = None,
+    restart: bool = False,
+) -> dict[str, int]:
+    """Populate entry_snapshot_bin for every trade without a snapshot. Returns counters."""
+    from data_service.codec import encode_entry_snapshot
+    from data_service.service import enrich_trades
+
+    checkpoint = {} if restart else _load_checkpoint(checkpoint_path, user_id)
+    after = (checkpoint["symbol"], checkpoint["id"]) if checkpoint else None
+    stats = {"scanned": checkpoint.get("scanned", 0), "written": checkpoint.get("written", 0)}
+    started = time.monotonic()
+
+    while True:
+        rows = _next_chunk(after, chunk_size, user_id)
+        if not rows:
+            break
+        trades = [
+            {
+                "id": r.id,
+                "symbol": r.symbol,
+                "entry_time": r.entry_time.isoformat() if r.entry_time else None,
+                "exit_time": r.exit_time.isoformat() if r.exit_time else None,
+            }
+            for r in rows
+        ]
+        enrich_trades(trades)
+        updates = [
+            {"id": t["id"], "entry_snapshot_bin": encode_entry_snapshot(t["market_context"])}
+            for t in trades
+            if t.get("market_context", {}).get("data_available")
+        ]
+        _write_chunk(updates)
+
+        after = (rows[-1].symbol, rows[-1].id)
+        stats["scanned"] += len(rows)
+        stats["written"] += len(updates)
+        _save_checkpoint(checkpoint_path, {"user_id": user_id, "symbol": after[0], "id": after[1], **stats})
+        elapsed = time.monotonic() - started
+        logger.info(
+            "backfill: %d scanned, %d written, at %s (%.0f trades/s)",
+            stats["scanned"], stats["written"], after[0], stats["scanned"] / elapsed if elapsed else 0.0,
+        )
+    return stats
+
+
+def _next_chunk(after: tuple[str, str] | None, chunk_size: int, user_id: str | None) -> list:
+    db = SessionLocal()
+    try:
+        q = (
+            select(TradeORM.id, TradeORM.symbol, TradeORM.entry_time, TradeORM.exit_time)
+            .where(TradeORM.entry_snapshot_json.is_(None), TradeORM.entry_snapshot_bin.is_(None))
+            .order_by(TradeORM.symbol, TradeORM.id)
+            .limit(chunk_size)
+        )
+        if user_id:
+            q = q.where(TradeORM.user_id == user_id)
+        if after is not None:
+            q = q.where(tuple_(TradeORM.symbol, TradeORM.id) > after)
+        return list(db.execute(q).all())
+    finally:
+        db.close()
+
+
+def _write_chunk(updates: list[dict]) -> None:
+    if not updates:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(update(TradeORM), updates)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _load_checkpoint(path: Path, user_id: str | None) -> dict:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("user_id") != user_id:
+        logger.info("checkpoint %s is for another user filter, starting over", path)
+        return {}
+    return data
+
+
+def _save_checkpoint(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Backfill entry snapshots for trades without one.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--user", default=None, help="only backfill this user's trades")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and rescan")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if SessionLocal.kw.get("bind") is None:
+        SessionLocal.configure(bind=make_engine(get_database_url()))
+    stats = backfill_snapshots(args.chunk_size, args.checkpoint, args.user, args.restart)
+    print(f"scanned {stats['scanned']} trades, wrote {stats['written']} snapshots")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""K-line prefetcher: warm the K-line cache after market close.
+
+Analysis runs fetch market data on demand inside call_analyzer, although the
+symbols that matter are known in advance: every OPEN trade plus the symbols
+traded in the last few weeks. Once per trading day, after the close, the worker
+loads bars for those symbols (deduplicated across users) through the shared
+provider chain, so the on-disk K-line cache is warm for the next review.
+
+Settings (config.json -> market_data):
+    prefetch_after           "HH:MM" Asia/Shanghai, default "15:30"; null disables
+    prefetch_lookback_weeks  recently traded window, default 8
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, or_, select
+
+from app.config import get_market_data_config
+from app.db import SessionLocal, TradeORM
+
+logger = logging.getLogger(__name__)
+
+CN_TZ = ZoneInfo("Asia/Shanghai")
+DEFAULT_PREFETCH_AFTER = "15:30"
+DEFAULT_LOOKBACK_WEEKS = 8
+
+
+def prefetch_targets(lookback_weeks: int = DEFAULT_LOOKBACK_WEEKS) -> dict[str, str]:
+    """Symbols worth prefetching -> earliest entry date that needs bars (all users)."""
+    since = datetime.now(timezone.utc) - timedelta(weeks=lookback_weeks)
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(TradeORM.symbol, func.min(TradeORM.entry_time))
+            .where(or_(
+                TradeORM.status == "OPEN",
+                TradeORM.entry_time >= since,
+                TradeORM.exit_time >= since,
+            ))
+            .group_by(TradeORM.symbol)
+        ).all()
+    finally:
+        db.close()
+    targets: dict[str, str] = {}
+    for symbol, entry_time in rows:
+        if not symbol or entry_time is None:
+            continue
+        code = symbol.strip().upper()
+        entry_date = entry_time.astimezone(CN_TZ).date().isoformat()
+        targets[code] = min(entry_date, targets.get(code, entry_date))
+    return targets
+
+
+def prefetch_klines(targets: dict[str, str], max_workers: int = 4) -> dict[str, int]:
+    """Load bars for each symbol from before its earliest entry up to today. Returns bar counts."""
+    from data_service.enrichment import CONTEXT_BARS_BEFORE
+    from data_service.registry import get_market_data_provider
+    from data_service.trading_calendar import get_trading_calendar
+
+    provider = get_market_data_provider()
+    calendar = get_trading_calendar()
+    today = datetime.now(CN_TZ).date().isoformat()
+
+    def fetch(item: tuple[str, str]) -> tuple[str, int]:
+        symbol, entry_date = item
+        start = calendar.shift(entry_date, -CONTEXT_BARS_BEFORE)
+        try:
+            return symbol, len(provider.get_klines(symbol, start, today))
+        except Exception as e:
+            logger.warning("prefetch failed for %s: %s", symbol, e)
+            return symbol, 0
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        return dict(pool.map(fetch, sorted(targets.items())))
+
+
+class PrefetchScheduler:
+    """Runs the prefetch once per trading day after `prefetch_after`, on a background thread."""
+
+    def __init__(self) -> None:
+        cfg = get_market_data_config()
+        self.after = cfg.get("prefetch_after", DEFAULT_PREFETCH_AFTER)
+        self.lookback_weeks = int(cfg.get("prefetch_lookback_weeks", DEFAULT_LOOKBACK_WEEKS))
+        self.max_workers = int(cfg.get("max_workers", 8))
+        self._last_run = ""
+        self._thread: threading.Thread | None = None
+
+    def maybe_start(self, now: datetime | None = None) -> bool:
+        """Start today's prefetch if it is due and not already running. Non-blocking."""
+        if not self.after:
+            return False
+        now = (now or datetime.now(CN_TZ)).astimezone(CN_TZ)
+        today = now.date().isoformat()
+        if self._last_run == today or now.strftime("%H:%M") < self.after:
+            return False
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        from data_service.trading_calendar import get_trading_calendar
+
+        self._last_run = today
+        if not get_trading_calendar().is_trading_day(today):
+            return False
+        self._thread = threading.Thread(target=self.run, name="kline-prefetch", daemon=True)
+        self._thread.start()
+        return True
+
+    def run(self) -> dict[str, int]:
+        started = time.monotonic()
+        try:
+            targets = prefetch_targets(self.lookback_weeks)
+            counts = prefetch_klines(targets, self.max_workers)
+        except Exception as e:
+            logger.error("K-line prefetch failed: %s", e)
+            return {}
+        logger.info(
+            "prefetched %d symbols (%d bars) in %.1fs",
+            len(counts), sum(counts.values()), time.monotonic() - started,
+        )
+        return counts
@@ -4,23 +4,30 @@ from __future__ import annotations
 
 import time
 
+from app.config import get_database_url
 from app.consts import QUEUE_NAME, REDIS_URL, RESULT_PREFIX
+from app.db import SessionLocal, make_engine
 
 from .executor import SandboxExecutor, ToolProxy
+from .prefetch import PrefetchScheduler
 from .queue import dequeue, enqueue_result
 from agents.tools import register_all
 
 
 def run_worker(poll_interval: float = 1.0) -> None:
-    """Poll Redis for tasks, spawn sandbox, write result."""
+    """Poll Redis for tasks, spawn sandbox, write result. Prefetches K-lines after market close."""
     if not REDIS_URL:
         raise RuntimeError("REDIS_URL required for worker")
+    if SessionLocal.kw.get("bind") is None:
+        SessionLocal.configure(bind=make_engine(get_database_url()))
 
     tool_proxy = ToolProxy()
     register_all(tool_proxy)
     executor = SandboxExecutor(tool_proxy=tool_proxy)
+    prefetcher = PrefetchScheduler()
 
     while True:
+        prefetcher.maybe_start()
         task = dequeue(REDIS_URL, QUEUE_NAME)
         if not task:
             time.sleep(poll_interval)
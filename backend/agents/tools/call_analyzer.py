@@ -1,4 +1,8 @@
-"""Tool: call_analyzer - fetch trades, enrich, run analysis engine."""
+"""Tool: call_analyzer - fetch trades, enrich, run analysis engine.
+
+Enrichment reuses each trade's stored entry_snapshot and only fetches the
+missing bars; the merged market context is written back for the next run.
+"""
 
 from __future__ import annotations
 
@@ -7,6 +11,7 @@ from typing import Any
 from analysis.engine import analyze
 from data_service.service import enrich_trades
 
+from .common import save_market_snapshots
 from .get_trades_for_analysis import handle_get_trades_for_analysis
 from .schema import ToolParam, make_remote_tool
 
@@ -16,10 +21,12 @@ def handle_call_analyzer(user_id: str, **kwargs: Any) -> dict:
         user_id=user_id,
         date_from=kwargs.get("date_from", ""),
         date_to=kwargs.get("date_to", ""),
+        columnar_snapshot=True,
     )
     trades = trades_data.get("trades", [])
 
     enriched = enrich_trades(trades)
+    save_market_snapshots(user_id, enriched)
 
     return analyze(
         enriched,
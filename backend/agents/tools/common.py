@@ -18,7 +18,8 @@ def get_db() -> Session:
     return SessionLocal()
 
 
-def trade_to_dict(t: TradeORM) -> dict[str, Any]:
+def trade_to_dict(t: TradeORM, columnar_snapshot: bool = False) -> dict[str, Any]:
+    """columnar_snapshot=True 时 entry_snapshot 的K线保持 KLineSeries (供丰富化复用，非 JSON 安全)。"""
     out: dict[str, Any] = {
         "id": t.id,
         "symbol": t.symbol,
@@ -39,11 +40,27 @@ def trade_to_dict(t: TradeORM) -> dict[str, Any]:
         "rule_flags": loads(t.rule_flags_json),
         "tags": loads(t.tags_json),
     }
-    if getattr(t, "entry_snapshot_json", None):
-        out["entry_snapshot"] = loads(t.entry_snapshot_json)
+    snapshot = load_entry_snapshot(t, columnar=columnar_snapshot)
+    if snapshot:
+        out["entry_snapshot"] = snapshot
     return out
 
 
+def load_entry_snapshot(t: TradeORM, columnar: bool = False) -> dict[str, Any] | None:
+    """读取入场快照：优先二进制列 entry_snapshot_bin，兼容旧的 entry_snapshot_json。"""
+    from data_service.codec import read_stored_snapshot
+
+    try:
+        return read_stored_snapshot(
+            getattr(t, "entry_snapshot_bin", None),
+            getattr(t, "entry_snapshot_json", None),
+            columnar=columnar,
+        )
+    except Exception as e:
+        logger.warning("unreadable entry snapshot for trade %s: %s", t.id, e)
+        return None
+
+
 def parse_time(s: str) -> datetime:
     from dateutil.parser import parse as dt_parse
     try:
@@ -87,10 +104,11 @@ def get_record_hints(user_id: str, trade_id: str, symbol: str, position_pct: flo
 
 
 def schedule_entry_snapshot(user_id: str, trade_id: str) -> None:
-    """后台线程：拉取该笔交易的入场日市场快照并写入 entry_snapshot_json。不阻塞保存。"""
+    """后台线程：拉取该笔交易的入场日市场快照并写入 entry_snapshot_bin。不阻塞保存。"""
     def _run() -> None:
         try:
-            from app.db import SessionLocal, dumps
+            from app.db import SessionLocal
+            from data_service.codec import encode_entry_snapshot
             from data_service.service import enrich_single_trade
 
             db = SessionLocal()
@@ -103,7 +121,8 @@ def schedule_entry_snapshot(user_id: str, trade_id: str) -> None:
                 snapshot = trade.get("market_context")
                 if not snapshot:
                     return
-                t.entry_snapshot_json = dumps(snapshot)
+                t.entry_snapshot_bin = encode_entry_snapshot(snapshot)
+                t.entry_snapshot_json = None
                 t.updated_at = datetime.now(timezone.utc)
                 db.commit()
             finally:
@@ -113,3 +132,36 @@ def schedule_entry_snapshot(user_id: str, trade_id: str) -> None:
 
     thread = threading.Thread(target=_run, daemon=True)
     thread.start()
+
+
+def save_market_snapshots(user_id: str, trades: list[dict]) -> int:
+    """把增量丰富化后的 market_context 写回 entry_snapshot_bin，下次分析只需补拉缺口。
+
+    仅在覆盖区间 (coverage) 比已存快照更大时写入；不更新 updated_at。返回写入笔数。
+    """
+    from data_service.codec import encode_entry_snapshot
+
+    updates: dict[str, bytes] = {}
+    for trade in trades:
+        context = trade.get("market_context") or {}
+        coverage = context.get("coverage")
+        if not trade.get("id") or not context.get("data_available") or not coverage:
+            continue
+        if coverage != (trade.get("entry_snapshot") or {}).get("coverage"):
+            updates[trade["id"]] = encode_entry_snapshot(context)
+    if not updates:
+        return 0
+    db = get_db()
+    try:
+        rows = db.query(TradeORM).filter(TradeORM.user_id == user_id, TradeORM.id.in_(list(updates))).all()
+        for t in rows:
+            t.entry_snapshot_bin = updates[t.id]
+            t.entry_snapshot_json = None
+        db.commit()
+        return len(rows)
+    except Exception as e:
+        db.rollback()
+        logger.warning("saving market snapshots failed: %s", e)
+        return 0
+    finally:
+        db.close()
@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 from typing import Any
 
 from app.db import TradeORM, dumps
+from app.metrics import record_trade_change, trade_metrics_input
 
 from .common import get_db, get_record_hints, parse_time, schedule_entry_snapshot
 from .schema import ToolParam, make_remote_tool
@@ -53,6 +54,7 @@ def handle_create_trade(user_id: str, **kwargs: Any) -> dict:
             updated_at=now,
         )
         db.add(trade)
+        record_trade_change(db, user_id, None, trade_metrics_input(trade))
         db.commit()
 
         hints = get_record_hints(user_id, trade_id, symbol, position_pct)
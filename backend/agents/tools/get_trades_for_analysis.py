@@ -10,7 +10,11 @@ from .common import get_db, parse_time, trade_to_dict
 
 
 def handle_get_trades_for_analysis(user_id: str, **kwargs: Any) -> dict:
-    """Fetch trades for a date range, used by Orchestrator's call_analyzer."""
+    """Fetch trades for a date range, used by Orchestrator's call_analyzer.
+
+    columnar_snapshot=True keeps stored snapshots as KLineSeries for in-process
+    enrichment; the tool result is then not JSON-serializable.
+    """
     db = get_db()
     try:
         q = db.query(TradeORM).filter(TradeORM.user_id == user_id)
@@ -19,6 +23,7 @@ def handle_get_trades_for_analysis(user_id: str, **kwargs: Any) -> dict:
         if kwargs.get("date_to"):
             q = q.filter(TradeORM.entry_time <= parse_time(kwargs["date_to"]))
         rows = q.order_by(TradeORM.entry_time.asc()).all()
-        return {"trades": [trade_to_dict(r) for r in rows]}
+        columnar = bool(kwargs.get("columnar_snapshot"))
+        return {"trades": [trade_to_dict(r, columnar_snapshot=columnar) for r in rows]}
     finally:
         db.close()
@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 from typing import Any
 
 from app.db import TradeORM, dumps
+from app.metrics import record_trade_change, trade_metrics_input
 
 from .common import get_db, parse_time
 from .schema import ToolParam, make_remote_tool
@@ -27,6 +28,7 @@ def handle_update_trade(user_id: str, **kwargs: Any) -> dict:
             return {"error": f"trade {trade_id} not found"}
 
         now = datetime.now(timezone.utc)
+        before = trade_metrics_input(trade)
 
         if kwargs.get("status"):
             trade.status = kwargs["status"]
@@ -43,6 +45,7 @@ def handle_update_trade(user_id: str, **kwargs: Any) -> dict:
             trade.notes = kwargs["notes"]
 
         trade.updated_at = now
+        record_trade_change(db, user_id, before, trade_metrics_input(trade))
         db.commit()
         return {"trade_id": trade_id, "status": "updated"}
     except Exception as e:
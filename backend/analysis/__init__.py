@@ -2,6 +2,7 @@
 
 Architecture:
 - engine.py: Router that dispatches to Base + Style analyzers, merges results
+- context.py: Per-run AnalysisContext memoizing per-trade derived values
 - base.py: Common metrics shared across all trading styles (win rate, 3M scores, etc.)
 - styles/: Pluggable style-specific analyzers (technical, value, trend, short_term)
 """
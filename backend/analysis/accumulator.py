@@ -0,0 +1,166 @@
+"""Mergeable running totals for the base metrics.
+
+A MetricAccumulator holds everything analysis.base needs to produce its
+metrics dict, as counters and sums that change by one trade's contribution at
+a time: add(), remove() and update() are O(1), and merge() combines two
+accumulators over disjoint trade sets, e.g. the weeks of a month, without the
+raw trades. Counts are integers; the closed trades' P&L and risk/reward are
+kept per trade by (entry_time, id), and the float sums, streaks and largest
+loss are taken over them in entry order when metrics() is read, so removals
+leave no rounding residue and the result equals base.analyze() on the same
+trades in entry order.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from .base import (
+    _empty_result,
+    build_metrics,
+    build_mind_diagnosis,
+    build_money_diagnosis,
+    check_stop_followed,
+)
+
+DEFAULT_MAX_POSITION_PCT = 0.3
+
+
+class MetricAccumulator:
+    """Counters and sums behind analysis.base.analyze for a set of trades."""
+
+    def __init__(self, max_position_pct: float = DEFAULT_MAX_POSITION_PCT) -> None:
+        self.max_position_pct = max_position_pct
+        self.total = 0
+        self.position_compliant = 0
+        self.stop_count = 0
+        self.stop_followed = 0
+        self.flagged_trades = 0
+        self.emotion_counts: dict[str, int] = {}
+        self.flag_counts: dict[str, int] = {}
+        # (entry_time, id) -> (pnl, risk/reward or None) of each closed trade
+        self.closed: dict[tuple[str, str], tuple[float, float | None]] = {}
+
+    @classmethod
+    def from_trades(cls, trades: Iterable[dict], max_position_pct: float = DEFAULT_MAX_POSITION_PCT) -> MetricAccumulator:
+        acc = cls(max_position_pct)
+        for t in trades:
+            acc.add(t)
+        return acc
+
+    def add(self, trade: dict) -> None:
+        self._apply(trade, 1)
+
+    def remove(self, trade: dict) -> None:
+        """Take out a trade previously added (pass the trade as it was when added)."""
+        self._apply(trade, -1)
+
+    def update(self, before: dict, after: dict) -> None:
+        self._apply(before, -1)
+        self._apply(after, 1)
+
+    def merge(self, other: MetricAccumulator) -> MetricAccumulator:
+        """Add another accumulator's trades (disjoint from ours) in place; returns self."""
+        if other.max_position_pct != self.max_position_pct:
+            raise ValueError("cannot merge accumulators with different max_position_pct")
+        for name in _COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        _add_counts(self.emotion_counts, other.emotion_counts, 1)
+        _add_counts(self.flag_counts, other.flag_counts, 1)
+        self.closed.update(other.closed)
+        return self
+
+    def metrics(self) -> dict:
+        """The analysis.base.analyze() result for the accumulated trades."""
+        if not self.total:
+            return _empty_result()
+        closed = [self.closed[key] for key in sorted(self.closed)]
+        pnl_values = [pnl for pnl, _ in closed]
+        win_pnl = [p for p in pnl_values if p > 0]
+        loss_pnl = [p for p in pnl_values if p < 0]
+        ratios = [rr for _, rr in closed if rr is not None]
+        return build_metrics(
+            self.total,
+            pnl_values,
+            win_count=len(win_pnl),
+            loss_count=len(loss_pnl),
+            total_profit=sum(win_pnl),
+            total_loss=abs(sum(loss_pnl)),
+            avg_rr=sum(ratios) / len(ratios) if ratios else 0.0,
+            money=build_money_diagnosis(self.total, self.position_compliant, self.stop_count, self.stop_followed),
+            mind=build_mind_diagnosis(self.total, self.emotion_counts, self.flag_counts, self.flagged_trades),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-safe form (see from_dict)."""
+        data: dict[str, Any] = {"max_position_pct": self.max_position_pct}
+        data.update((name, getattr(self, name)) for name in _COUNTERS)
+        data["emotion_counts"] = dict(self.emotion_counts)
+        data["flag_counts"] = dict(self.flag_counts)
+        data["closed"] = [[entry, trade_id, pnl, rr] for (entry, trade_id), (pnl, rr) in self.closed.items()]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> MetricAccumulator:
+        acc = cls(data.get("max_position_pct", DEFAULT_MAX_POSITION_PCT))
+        for name in _COUNTERS:
+            setattr(acc, name, data.get(name, 0))
+        acc.emotion_counts = dict(data.get("emotion_counts") or {})
+        acc.flag_counts = dict(data.get("flag_counts") or {})
+        acc.closed = {(entry, trade_id): (pnl, rr) for entry, trade_id, pnl, rr in data.get("closed") or []}
+        return acc
+
+    def _apply(self, t: dict, sign: int) -> None:
+        self.total += sign
+        if (t.get("position_pct") or 0) <= self.max_position_pct:
+            self.position_compliant += sign
+        if t.get("stop_loss") is not None:
+            self.stop_count += sign
+            if check_stop_followed(t):
+                self.stop_followed += sign
+        emotions = t.get("emotion_tags") or []
+        flags = t.get("rule_flags") or []
+        _add_counts(self.emotion_counts, _count(emotions), sign)
+        _add_counts(self.flag_counts, _count(flags), sign)
+        if flags:
+            self.flagged_trades += sign
+
+        if t.get("status") != "CLOSED":
+            return
+        key = (str(t.get("entry_time") or ""), str(t.get("id") or ""))
+        if sign < 0:
+            self.closed.pop(key, None)
+            return
+        pnl = t.get("pnl_cny", 0)
+        self.closed[key] = (0 if pnl is None else pnl, _risk_reward(t))
+
+
+_COUNTERS = ("total", "position_compliant", "stop_count", "stop_followed", "flagged_trades")
+
+
+def _risk_reward(t: dict) -> float | None:
+    """Reward / planned risk of a closed trade, None when not computable (as in base)."""
+    if not (t.get("stop_loss") and t.get("entry_price") and t.get("exit_price")):
+        return None
+    entry, sl, ep = t["entry_price"], t["stop_loss"], t["exit_price"]
+    if t.get("direction", "LONG") == "LONG":
+        risk, reward = entry - sl, ep - entry
+    else:
+        risk, reward = sl - entry, entry - ep
+    return reward / risk if risk > 0 else None
+
+
+def _count(tags: list[str]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for tag in tags:
+        counts[tag] = counts.get(tag, 0) + 1
+    return counts
+
+
+def _add_counts(target: dict[str, int], counts: dict[str, int], sign: int) -> None:
+    for tag, n in counts.items():
+        value = target.get(tag, 0) + sign * n
+        if value:
+            target[tag] = value
+        else:
+            target.pop(tag, None)
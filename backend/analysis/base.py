@@ -7,40 +7,69 @@ Pure code computation, no LLM needed. Covers:
 - Stop-loss execution rate
 - Emotion tag distribution (Mind dimension)
 - Discipline violation frequency
+
+Batch metrics are computed over a columnar TradeFrame (see analysis.frame).
 """
 
 from __future__ import annotations
 
-from collections import Counter
+from itertools import compress
 from typing import Any
 
+from .frame import NEGATIVE_EMOTIONS, TradeFrame
+
 
-def analyze(trades: list[dict], risk_rules: dict | None = None) -> dict:
+def analyze(trades: list[dict] | TradeFrame, risk_rules: dict | None = None) -> dict:
     """Compute base metrics for a list of trades.
 
     Args:
         trades: list of trade dicts with at least: pnl_cny, status, emotion_tags,
-                rule_flags, position_pct, stop_loss, exit_price
+                rule_flags, position_pct, stop_loss, exit_price (or a TradeFrame
+                built from them)
         risk_rules: optional dict with max_single_risk_pct, max_position_pct, etc.
     """
     if not trades:
         return _empty_result()
 
     risk_rules = risk_rules or {}
-    closed = [t for t in trades if t.get("status") == "CLOSED"]
-    total = len(trades)
-    closed_count = len(closed)
-
-    wins = [t for t in closed if (t.get("pnl_cny") or 0) > 0]
-    losses = [t for t in closed if (t.get("pnl_cny") or 0) < 0]
-    breakeven = [t for t in closed if (t.get("pnl_cny") or 0) == 0]
-
-    win_count = len(wins)
-    loss_count = len(losses)
+    frame = trades if isinstance(trades, TradeFrame) else TradeFrame.from_trades(trades)
+    total = len(frame)
+    pnl_values = frame.closed_pnl()
+
+    win_pnl = [p for p in pnl_values if p > 0]
+    loss_pnl = [p for p in pnl_values if p < 0]
+
+    return build_metrics(
+        total,
+        pnl_values,
+        win_count=len(win_pnl),
+        loss_count=len(loss_pnl),
+        total_profit=sum(win_pnl),
+        total_loss=abs(sum(loss_pnl)),
+        avg_rr=_avg_risk_reward(frame),
+        money=_money_diagnosis(frame, risk_rules),
+        mind=_mind_diagnosis(frame),
+    )
+
+
+def build_metrics(
+    total: int,
+    pnl_values: list[float],
+    win_count: int,
+    loss_count: int,
+    total_profit: float,
+    total_loss: float,
+    avg_rr: float,
+    money: dict,
+    mind: dict,
+) -> dict:
+    """Base metrics dict from aggregates (shared with analysis.accumulator).
+
+    pnl_values are the closed trades' P&L in trade order; total_loss is positive.
+    """
+    closed_count = len(pnl_values)
     win_rate = win_count / closed_count if closed_count > 0 else 0.0
 
-    total_profit = sum(t.get("pnl_cny", 0) for t in wins)
-    total_loss = abs(sum(t.get("pnl_cny", 0) for t in losses))
     avg_win = total_profit / win_count if win_count > 0 else 0.0
     avg_loss = total_loss / loss_count if loss_count > 0 else 0.0
 
@@ -48,15 +77,9 @@ def analyze(trades: list[dict], risk_rules: dict | None = None) -> dict:
     loss_rate = 1 - win_rate
     expectancy = (win_rate * avg_win) - (loss_rate * avg_loss)
 
-    pnl_values = [t.get("pnl_cny", 0) for t in closed]
     max_single_loss = min(pnl_values) if pnl_values else 0.0
-    max_consecutive_losses = _max_consecutive(pnl_values, lambda x: x < 0)
-    max_consecutive_wins = _max_consecutive(pnl_values, lambda x: x > 0)
-
-    avg_rr = _avg_risk_reward(closed)
-
-    money = _money_diagnosis(trades, risk_rules)
-    mind = _mind_diagnosis(trades)
+    max_consecutive_losses = _longest_run(bytes([p < 0 for p in pnl_values]))
+    max_consecutive_wins = _longest_run(bytes([p > 0 for p in pnl_values]))
 
     return {
         "total_trades": total,
@@ -64,7 +87,7 @@ def analyze(trades: list[dict], risk_rules: dict | None = None) -> dict:
         "open_trades": total - closed_count,
         "win_count": win_count,
         "loss_count": loss_count,
-        "breakeven_count": len(breakeven),
+        "breakeven_count": closed_count - win_count - loss_count,
         "win_rate": round(win_rate, 4),
         "total_profit": round(total_profit, 2),
         "total_loss": round(total_loss, 2),
@@ -112,7 +135,7 @@ def analyze_single(trade: dict, context: dict | None = None) -> dict:
             result["actual_reward"] = round(reward, 2)
             result["actual_rr"] = round(reward / risk, 2) if risk > 0 else None
 
-    stop_followed = _check_stop_followed(trade)
+    stop_followed = check_stop_followed(trade)
     result["stop_loss_followed"] = stop_followed
 
     result["emotion_tags"] = trade.get("emotion_tags", [])
@@ -125,16 +148,27 @@ def analyze_single(trade: dict, context: dict | None = None) -> dict:
     return result
 
 
-def _money_diagnosis(trades: list[dict], risk_rules: dict) -> dict:
+def _money_diagnosis(frame: TradeFrame, risk_rules: dict) -> dict:
     max_pos = risk_rules.get("max_position_pct", 0.3)
-    compliant = sum(1 for t in trades if (t.get("position_pct") or 0) <= max_pos)
-    position_compliance = compliant / len(trades) if trades else 0.0
+    compliant = sum([p <= max_pos for p in frame.position_pct])
+
+    has_stop = [sl == sl for sl in frame.stop_loss]  # False for NaN (no stop)
+    stop_count = sum(has_stop)
+
+    # A stop is followed unless both stop and exit are set and the exit breaches it (2% tolerance).
+    stop_followed = sum(
+        1
+        for long, sl, ep in compress(zip(frame.long, frame.stop_loss, frame.exit_price), has_stop)
+        if not (sl and ep and ep == ep) or (ep >= sl * 0.98 if long else ep <= sl * 1.02)
+    )
+    return build_money_diagnosis(len(frame), compliant, stop_count, stop_followed)
 
-    has_stop = [t for t in trades if t.get("stop_loss") is not None]
-    stop_set_rate = len(has_stop) / len(trades) if trades else 0.0
 
-    stop_followed = sum(1 for t in has_stop if _check_stop_followed(t))
-    stop_exec_rate = stop_followed / len(has_stop) if has_stop else 0.0
+def build_money_diagnosis(total: int, compliant: int, stop_count: int, stop_followed: int) -> dict:
+    """Money dimension from trade counts: position-compliant, with a stop, stop followed."""
+    position_compliance = compliant / total if total else 0.0
+    stop_set_rate = stop_count / total if total else 0.0
+    stop_exec_rate = stop_followed / stop_count if stop_count else 0.0
 
     return {
         "position_compliance_rate": round(position_compliance, 4),
@@ -144,32 +178,34 @@ def _money_diagnosis(trades: list[dict], risk_rules: dict) -> dict:
     }
 
 
-def _mind_diagnosis(trades: list[dict]) -> dict:
-    all_emotions: list[str] = []
-    for t in trades:
-        all_emotions.extend(t.get("emotion_tags", []))
-    emotion_dist = dict(Counter(all_emotions))
+def _mind_diagnosis(frame: TradeFrame) -> dict:
+    flags = frame.rule_flags
+    return build_mind_diagnosis(len(frame), frame.emotions.counts, flags.counts, flags.tagged_count())
 
-    all_flags: list[str] = []
-    for t in trades:
-        all_flags.extend(t.get("rule_flags", []))
-    violation_dist = dict(Counter(all_flags))
-    violation_rate = len([t for t in trades if t.get("rule_flags")]) / len(trades) if trades else 0.0
 
-    negative = {"ANXIOUS", "GREEDY", "FEARFUL", "IMPULSIVE", "REVENGE", "FOMO"}
-    negative_count = sum(1 for e in all_emotions if e in negative)
-    emotional_trade_rate = negative_count / len(all_emotions) if all_emotions else 0.0
+def build_mind_diagnosis(
+    total: int,
+    emotion_counts: dict[str, int],
+    flag_counts: dict[str, int],
+    flagged_trades: int,
+) -> dict:
+    """Mind dimension from tag totals and the number of trades with any rule flag."""
+    violation_rate = flagged_trades / total if total else 0.0
+
+    emotion_count = sum(emotion_counts.values())
+    negative_count = sum(emotion_counts.get(tag, 0) for tag in NEGATIVE_EMOTIONS)
+    emotional_trade_rate = negative_count / emotion_count if emotion_count else 0.0
 
     return {
-        "emotion_distribution": emotion_dist,
-        "violation_distribution": violation_dist,
+        "emotion_distribution": dict(emotion_counts),
+        "violation_distribution": dict(flag_counts),
         "violation_rate": round(violation_rate, 4),
         "emotional_trade_rate": round(emotional_trade_rate, 4),
         "score": round(_score_mind(violation_rate, emotional_trade_rate), 1),
     }
 
 
-def _check_stop_followed(trade: dict) -> bool:
+def check_stop_followed(trade: dict) -> bool:
     if not trade.get("stop_loss") or not trade.get("exit_price"):
         return True
     sl = trade["stop_loss"]
@@ -181,15 +217,13 @@ def _check_stop_followed(trade: dict) -> bool:
         return ep <= sl * 1.02
 
 
-def _avg_risk_reward(closed: list[dict]) -> float:
+def _avg_risk_reward(frame: TradeFrame) -> float:
     ratios = []
-    for t in closed:
-        if t.get("stop_loss") and t.get("entry_price") and t.get("exit_price"):
-            entry = t["entry_price"]
-            sl = t["stop_loss"]
-            ep = t["exit_price"]
-            direction = t.get("direction", "LONG")
-            if direction == "LONG":
+    columns = zip(frame.long, frame.entry_price, frame.stop_loss, frame.exit_price)
+    for long, entry, sl, ep in compress(columns, frame.closed):
+        # all three set: non-zero and not NaN
+        if sl and entry and ep and sl == sl and entry == entry and ep == ep:
+            if long:
                 risk = entry - sl
                 reward = ep - entry
             else:
@@ -200,16 +234,9 @@ def _avg_risk_reward(closed: list[dict]) -> float:
     return sum(ratios) / len(ratios) if ratios else 0.0
 
 
-def _max_consecutive(values: list, predicate) -> int:
-    max_count = 0
-    current = 0
-    for v in values:
-        if predicate(v):
-            current += 1
-            max_count = max(max_count, current)
-        else:
-            current = 0
-    return max_count
+def _longest_run(flags: bytes) -> int:
+    """Length of the longest run of 1s in a 0/1 byte string."""
+    return max(map(len, flags.split(b"\x00")), default=0)
 
 
 def _score_money(pos_compliance: float, stop_set: float, stop_exec: float) -> float:
@@ -0,0 +1,53 @@
+"""Per-run analysis context.
+
+One AnalysisContext is created per analysis request and handed to the base
+and style analyzers. It memoizes what is derived from the trades so each value
+is computed once per run, however many metrics read it:
+
+- per-trade values (keyword hits, signal verification, exit analysis,
+  indicator inputs) under a name, keyed by the trade dict's identity;
+- run-level results under a name (e.g. a style's batch metrics, which its
+  method diagnosis reuses);
+- the TradeFrame column view of the trades.
+
+A context only lives for one run; nothing is shared between requests.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Sequence
+
+from .frame import TradeFrame
+
+
+class AnalysisContext:
+    """Memo of values derived from one run's trades."""
+
+    def __init__(self, trades: Sequence[dict] = ()) -> None:
+        self.trades = trades
+        self._frame: TradeFrame | None = None
+        # (name, id(trade)) -> (trade, value); the trade is kept so its id is not reused
+        self._per_trade: dict[tuple[str, int], tuple[dict, Any]] = {}
+        self._results: dict[str, Any] = {}
+
+    @property
+    def frame(self) -> TradeFrame:
+        if self._frame is None:
+            self._frame = TradeFrame.from_trades(self.trades)
+        return self._frame
+
+    def trade_value(self, name: str, trade: dict, compute: Callable[[], Any]) -> Any:
+        """Value `name` of this trade, computed on first use."""
+        key = (name, id(trade))
+        hit = self._per_trade.get(key)
+        if hit is not None and hit[0] is trade:
+            return hit[1]
+        value = compute()
+        self._per_trade[key] = (trade, value)
+        return value
+
+    def result(self, name: str, compute: Callable[[], Any]) -> Any:
+        """Run-level value `name`, computed on first use."""
+        if name not in self._results:
+            self._results[name] = compute()
+        return self._results[name]
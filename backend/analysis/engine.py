@@ -11,6 +11,7 @@ from __future__ import annotations
 from typing import Any
 
 from . import base as base_analyzer
+from .context import AnalysisContext
 from .styles import get_style_analyzer
 
 
@@ -40,20 +41,21 @@ def _analyze_batch(
     style: str,
     risk_rules: dict | None = None,
 ) -> dict:
-    base_result = base_analyzer.analyze(trades, risk_rules)
+    ctx = AnalysisContext(trades)
+    base_result = base_analyzer.analyze(ctx.frame, risk_rules)
 
     style_result: dict[str, Any] = {}
     style_analyzer = get_style_analyzer(style)
     if style_analyzer:
         try:
-            style_result = style_analyzer.analyze_batch(trades, {})
+            style_result = style_analyzer.analyze_batch(trades, {}, ctx)
         except Exception as e:
             style_result = {"error": str(e)}
 
     method_diagnosis: dict[str, Any] = {}
     if style_analyzer:
         try:
-            method_diagnosis = style_analyzer.get_method_diagnosis(trades)
+            method_diagnosis = style_analyzer.get_method_diagnosis(trades, ctx)
         except Exception as e:
             method_diagnosis = {"error": str(e)}
 
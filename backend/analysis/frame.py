@@ -0,0 +1,99 @@
+"""Columnar view of a trade list for the metric computations.
+
+The trade dicts are read once into columns (one slot per trade), and the base
+metrics are computed as whole-column operations (masked sums, zips over
+columns, C-level counting) instead of repeated passes over dicts with
+`t.get(...)`.
+
+Missing prices are stored as NaN in `array("d")` columns, so "not set" and 0
+stay distinguishable where the dict-based rules differ (`is not None` vs
+truthiness); position_pct is only ever read as `or 0`, so it stores 0 instead.
+The P&L column keeps the values as given (int or float), so sums
+and extremes come out exactly as they would from the dicts.
+
+Tags are kept per trade with their total counts (repeats within one trade
+count, as in a Counter over all tags), which is all the mind diagnosis reads.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from collections import Counter
+from itertools import chain, compress
+from typing import Sequence
+
+NEGATIVE_EMOTIONS = frozenset({"ANXIOUS", "GREEDY", "FEARFUL", "IMPULSIVE", "REVENGE", "FOMO"})
+
+_NAN = math.nan
+
+
+class TagColumn:
+    """Tag lists of each trade and tag totals in first-seen order."""
+
+    __slots__ = ("lists", "counts")
+
+    def __init__(self, tag_lists: Sequence[Sequence[str] | None] = ()) -> None:
+        self.lists = tag_lists
+        self.counts: dict[str, int] = dict(Counter(chain.from_iterable(filter(None, tag_lists))))
+
+    def tagged_count(self) -> int:
+        """Number of trades with at least one tag."""
+        return sum(map(bool, self.lists))
+
+
+class TradeFrame:
+    """Trades stored column-wise, in the order given."""
+
+    __slots__ = (
+        "closed", "long", "pnl", "entry_price", "exit_price",
+        "stop_loss", "position_pct", "emotions", "rule_flags",
+    )
+
+    def __init__(self) -> None:
+        self.closed = bytearray()
+        self.long = bytearray()
+        self.pnl: list = []
+        self.entry_price = array("d")
+        self.exit_price = array("d")
+        self.stop_loss = array("d")
+        self.position_pct = array("d")
+        self.emotions = TagColumn()
+        self.rule_flags = TagColumn()
+
+    @classmethod
+    def from_trades(cls, trades: Sequence[dict]) -> TradeFrame:
+        frame = cls()
+        if not trades:
+            return frame
+        # One pass over the dicts, then a C-level transpose into columns.
+        rows = [
+            (
+                t.get("status") == "CLOSED", t.get("direction", "LONG") == "LONG",
+                t.get("pnl_cny", 0), t.get("entry_price"), t.get("exit_price"), t.get("stop_loss"),
+                t.get("position_pct") or 0, t.get("emotion_tags"), t.get("rule_flags"),
+            )
+            for t in trades
+        ]
+        closed, long, pnl, entry, exit_, stop, position, emotions, flags = zip(*rows)
+        frame.closed = bytearray(closed)
+        frame.long = bytearray(long)
+        frame.pnl = list(pnl)
+        frame.entry_price = _column(entry)
+        frame.exit_price = _column(exit_)
+        frame.stop_loss = _column(stop)
+        frame.position_pct = array("d", position)
+        frame.emotions = TagColumn(emotions)
+        frame.rule_flags = TagColumn(flags)
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.closed)
+
+    def closed_pnl(self) -> list[float]:
+        """P&L of closed trades in trade order (a missing value counts as 0)."""
+        return [0 if p is None else p for p in compress(self.pnl, self.closed)]
+
+
+def _column(values: Sequence[float | None]) -> array:
+    return array("d", [_NAN if v is None else v for v in values])
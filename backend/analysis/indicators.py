@@ -0,0 +1,295 @@
+"""Rolling technical indicators over columnar bar series.
+
+Each indicator is computed for the whole window in one O(n) pass (running
+sums, Wilder smoothing, monotonic deques for rolling extremes) and returned
+as an `array("d")` aligned with the bars, NaN where the indicator is not yet
+defined. An Indicators object computes each (indicator, parameters) column
+once on first use, and `indicators_for` keeps a bounded process-wide cache of
+them per (symbol, window), so trades on the same symbol and window, and
+repeated runs, share the columns.
+
+Conventions follow the usual A-share charting defaults: MACD(12, 26, 9) with
+histogram 2 * (DIF - DEA), BOLL(20, 2) with population deviation, KDJ(9, 3, 3)
+starting from K = D = 50, RSI and ATR with Wilder smoothing.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from array import array
+from collections import OrderedDict, deque
+from typing import Any, Callable, Hashable, Sequence
+
+_NAN = math.nan
+
+CACHE_SIZE = 256
+
+
+class Indicators:
+    """Indicator columns of one bar window, each computed once."""
+
+    def __init__(self, closes: Sequence[float], highs: Sequence[float], lows: Sequence[float]) -> None:
+        self.closes = closes
+        self.highs = highs
+        self.lows = lows
+        self._columns: dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.closes)
+
+    def sma(self, period: int) -> array:
+        return self._memo(("sma", period), lambda: sma(self.closes, period))
+
+    def ema(self, period: int) -> array:
+        return self._memo(("ema", period), lambda: ema(self.closes, period))
+
+    def macd(self, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple[array, array, array]:
+        """(DIF, DEA, histogram)."""
+        return self._memo(
+            ("macd", fast, slow, signal),
+            lambda: macd(self.closes, fast, slow, signal, self.ema(fast), self.ema(slow)),
+        )
+
+    def rsi(self, period: int = 14) -> array:
+        return self._memo(("rsi", period), lambda: rsi(self.closes, period))
+
+    def boll(self, period: int = 20, width: float = 2.0) -> tuple[array, array, array]:
+        """(middle, upper, lower)."""
+        return self._memo(("boll", period, width), lambda: boll(self.closes, period, width, self.sma(period)))
+
+    def kdj(self, period: int = 9, k_smooth: int = 3, d_smooth: int = 3) -> tuple[array, array, array]:
+        """(K, D, J)."""
+        return self._memo(
+            ("kdj", period, k_smooth, d_smooth),
+            lambda: kdj(self.highs, self.lows, self.closes, period, k_smooth, d_smooth),
+        )
+
+    def atr(self, period: int = 14) -> array:
+        return self._memo(("atr", period), lambda: atr(self.highs, self.lows, self.closes, period))
+
+    def _memo(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        column = self._columns.get(key)
+        if column is None:
+            column = compute()
+            with self._lock:
+                column = self._columns.setdefault(key, column)
+        return column
+
+
+_cache: OrderedDict[Hashable, Indicators] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def indicators_for(
+    key: Hashable | None,
+    closes: Sequence[float],
+    highs: Sequence[float],
+    lows: Sequence[float],
+) -> Indicators:
+    """Cached Indicators for a window, e.g. key = (symbol, first date, last date, bar count).
+
+    key=None skips the cache. The key names the window; a fingerprint of the
+    prices is added to it, so bars re-adjusted for dividends (qfq) or loaded
+    from an older snapshot do not reuse columns computed from other prices.
+    """
+    if key is None or not closes:
+        return Indicators(closes, highs, lows)
+    key = (key, len(closes), closes[-1], highs[-1], lows[-1], sum(closes))
+    with _cache_lock:
+        ind = _cache.get(key)
+        if ind is not None:
+            _cache.move_to_end(key)
+            return ind
+    ind = Indicators(closes, highs, lows)
+    with _cache_lock:
+        ind = _cache.setdefault(key, ind)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return ind
+
+
+# ---------------------------------------------------------------------------
+# Whole-series indicator passes
+# ---------------------------------------------------------------------------
+
+def sma(values: Sequence[float], period: int) -> array:
+    """Simple moving average (running window sum)."""
+    out = _nan_column(len(values))
+    if period <= 0 or len(values) < period:
+        return out
+    total = sum(values[:period])
+    out[period - 1] = total / period
+    for i in range(period, len(values)):
+        total += values[i] - values[i - period]
+        out[i] = total / period
+    return out
+
+
+def ema(values: Sequence[float], period: int) -> array:
+    """Exponential moving average, alpha = 2 / (period + 1), seeded with the first value."""
+    out = _nan_column(len(values))
+    if not len(values):
+        return out
+    alpha = 2.0 / (period + 1)
+    value = values[0]
+    out[0] = value
+    for i in range(1, len(values)):
+        value += alpha * (values[i] - value)
+        out[i] = value
+    return out
+
+
+def macd(
+    values: Sequence[float],
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9,
+    fast_ema: Sequence[float] | None = None,
+    slow_ema: Sequence[float] | None = None,
+) -> tuple[array, array, array]:
+    """(DIF, DEA, histogram = 2 * (DIF - DEA))."""
+    fast_ema = fast_ema if fast_ema is not None else ema(values, fast)
+    slow_ema = slow_ema if slow_ema is not None else ema(values, slow)
+    dif = array("d", map(float.__sub__, fast_ema, slow_ema))
+    dea = ema(dif, signal)
+    hist = array("d", [2.0 * (d - e) for d, e in zip(dif, dea)])
+    return dif, dea, hist
+
+
+def rsi(values: Sequence[float], period: int = 14) -> array:
+    """Relative strength index with Wilder smoothing; defined from bar `period`."""
+    n = len(values)
+    out = _nan_column(n)
+    if period <= 0 or n <= period:
+        return out
+    gain = loss = 0.0
+    for i in range(1, period + 1):
+        change = values[i] - values[i - 1]
+        if change > 0:
+            gain += change
+        else:
+            loss -= change
+    gain /= period
+    loss /= period
+    out[period] = _rsi_value(gain, loss)
+    for i in range(period + 1, n):
+        change = values[i] - values[i - 1]
+        gain = (gain * (period - 1) + max(change, 0.0)) / period
+        loss = (loss * (period - 1) + max(-change, 0.0)) / period
+        out[i] = _rsi_value(gain, loss)
+    return out
+
+
+def boll(
+    values: Sequence[float],
+    period: int = 20,
+    width: float = 2.0,
+    middle: Sequence[float] | None = None,
+) -> tuple[array, array, array]:
+    """Bollinger bands (middle, upper, lower) from running sums of x and x**2."""
+    n = len(values)
+    middle = middle if middle is not None else sma(values, period)
+    upper = _nan_column(n)
+    lower = _nan_column(n)
+    if period <= 0 or n < period:
+        return array("d", middle), upper, lower
+    squares = sum(v * v for v in values[:period])
+    for i in range(period - 1, n):
+        if i >= period:
+            squares += values[i] * values[i] - values[i - period] * values[i - period]
+        mean = middle[i]
+        deviation = math.sqrt(max(squares / period - mean * mean, 0.0))
+        upper[i] = mean + width * deviation
+        lower[i] = mean - width * deviation
+    return array("d", middle), upper, lower
+
+
+def kdj(
+    highs: Sequence[float],
+    lows: Sequence[float],
+    closes: Sequence[float],
+    period: int = 9,
+    k_smooth: int = 3,
+    d_smooth: int = 3,
+) -> tuple[array, array, array]:
+    """Stochastic K, D and J = 3K - 2D; RSV over the last `period` bars, K = D = 50 before the first."""
+    n = len(closes)
+    k_out, d_out, j_out = _nan_column(n), _nan_column(n), _nan_column(n)
+    highest = _rolling_extreme(highs, period, max)
+    lowest = _rolling_extreme(lows, period, min)
+    k = d = 50.0
+    for i in range(period - 1, n):
+        span = highest[i] - lowest[i]
+        rsv = (closes[i] - lowest[i]) / span * 100.0 if span > 0 else 50.0
+        k = ((k_smooth - 1) * k + rsv) / k_smooth
+        d = ((d_smooth - 1) * d + k) / d_smooth
+        k_out[i], d_out[i], j_out[i] = k, d, 3.0 * k - 2.0 * d
+    return k_out, d_out, j_out
+
+
+def atr(highs: Sequence[float], lows: Sequence[float], closes: Sequence[float], period: int = 14) -> array:
+    """Average true range with Wilder smoothing; defined from bar `period - 1`."""
+    n = len(closes)
+    out = _nan_column(n)
+    if period <= 0 or n < period:
+        return out
+    ranges = [highs[0] - lows[0]]
+    ranges += [
+        max(highs[i] - lows[i], abs(highs[i] - closes[i - 1]), abs(lows[i] - closes[i - 1]))
+        for i in range(1, n)
+    ]
+    value = sum(ranges[:period]) / period
+    out[period - 1] = value
+    for i in range(period, n):
+        value = (value * (period - 1) + ranges[i]) / period
+        out[i] = value
+    return out
+
+
+def crossed_above(fast: Sequence[float], slow: Sequence[float], i: int = -1) -> bool:
+    """True if `fast` moved from at or below `slow` at bar i-1 to above it at bar i."""
+    n = len(fast)
+    i = i + n if i < 0 else i
+    if i < 1 or i >= n:
+        return False
+    # NaN compares False, so undefined bars never count as a cross.
+    return fast[i] > slow[i] and fast[i - 1] <= slow[i - 1]
+
+
+def crossed_below(fast: Sequence[float], slow: Sequence[float], i: int = -1) -> bool:
+    return crossed_above(slow, fast, i)
+
+
+def last(column: Sequence[float]) -> float | None:
+    """Last value of a column, None if empty or not yet defined."""
+    if not len(column):
+        return None
+    value = column[-1]
+    return None if value != value else value
+
+
+def _rolling_extreme(values: Sequence[float], period: int, pick: Callable[[float, float], float]) -> list[float]:
+    """Max or min of the last `period` values at each bar (monotonic deque, O(n))."""
+    out: list[float] = []
+    window: deque[int] = deque()
+    for i, v in enumerate(values):
+        while window and pick(values[window[-1]], v) == v:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - period:
+            window.popleft()
+        out.append(values[window[0]])
+    return out
+
+
+def _rsi_value(gain: float, loss: float) -> float:
+    if loss == 0:
+        return 100.0 if gain > 0 else 50.0
+    return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+def _nan_column(n: int) -> array:
+    return array("d", [_NAN]) * n
@@ -0,0 +1,108 @@
+"""Keyword matching for free-text trade fields (entry reasons, strategy tags).
+
+A KeywordMatcher is compiled once from a category -> keywords table and
+answers, in one call, every keyword and category found in a text. Matching is
+substring containment, as with `kw in text`, done in a single pass: the
+keywords are merged into a trie-shaped regular expression wrapped in a
+lookahead, so the C regex engine walks the text once and, at each position,
+follows only the branch of the trie that the next characters select. The
+lookahead yields the longest keyword starting at each position; keywords
+nested inside it (e.g. "MACD" in "MACD金叉") are added from a table built at
+compile time.
+
+Results are memoized per text in a bounded LRU, so notes that come back on
+every analyze_single call, or are shared by many trades, are scanned once.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class KeywordHits:
+    """Keywords found in a text and the categories they belong to."""
+
+    keywords: frozenset[str] = frozenset()
+    categories: frozenset[str] = frozenset()
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+
+NO_HITS = KeywordHits()
+
+
+class KeywordMatcher:
+    """Keywords grouped by category, compiled for repeated matching."""
+
+    def __init__(self, categories: Mapping[str, Iterable[str]]) -> None:
+        owners: dict[str, set[str]] = {}
+        for category, keywords in categories.items():
+            for kw in keywords:
+                if kw:
+                    owners.setdefault(kw, set()).add(category)
+        self.keywords = frozenset(owners)
+        self._owners = {kw: frozenset(cats) for kw, cats in owners.items()}
+        # keyword -> every keyword it contains (itself included)
+        self._nested = {kw: frozenset(k for k in owners if k in kw) for kw in owners}
+        # the leading class rejects most positions before the trie branch is tried
+        first = "".join(sorted({re.escape(kw[0]) for kw in owners}))
+        self._pattern = re.compile(f"(?=[{first}])(?=({_trie_pattern(owners)}))") if owners else None
+        self._memo: OrderedDict[str, KeywordHits] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def match(self, text: str | None) -> KeywordHits:
+        """All keywords contained in text, with their categories."""
+        if not text or self._pattern is None:
+            return NO_HITS
+        with self._lock:
+            hits = self._memo.get(text)
+            if hits is not None:
+                self._memo.move_to_end(text)
+                return hits
+        hits = self._scan(text)
+        with self._lock:
+            self._memo[text] = hits
+            while len(self._memo) > CACHE_SIZE:
+                self._memo.popitem(last=False)
+        return hits
+
+    def search(self, text: str | None) -> bool:
+        """True if text contains any keyword."""
+        return bool(self.match(text))
+
+    def _scan(self, text: str) -> KeywordHits:
+        longest = set(self._pattern.findall(text))
+        if not longest:
+            return NO_HITS
+        nested = self._nested
+        found = frozenset().union(*(nested[kw] for kw in longest))
+        owners = self._owners
+        return KeywordHits(found, frozenset().union(*(owners[kw] for kw in found)))
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex matching the longest of `keywords` at a position, shaped like their trie."""
+    trie: dict = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def branch(node: dict) -> str:
+        alternatives = [re.escape(ch) + branch(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ""
+        body = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+        # a keyword ends here: the longer continuations are optional (tried first, greedily)
+        return f"(?:{body})?" if "" in node else body
+
+    return branch(trie)
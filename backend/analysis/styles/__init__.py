@@ -5,15 +5,18 @@ Registry pattern - each style module registers itself on import.
 
 from __future__ import annotations
 
-from typing import Protocol
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:
+    from ..context import AnalysisContext
 
 
 class StyleAnalyzerProtocol(Protocol):
     style_name: str
 
     def analyze_single(self, trade: dict, context: dict) -> dict: ...
-    def analyze_batch(self, trades: list[dict], period: dict) -> dict: ...
-    def get_method_diagnosis(self, trades: list[dict]) -> dict: ...
+    def analyze_batch(self, trades: list[dict], period: dict, ctx: AnalysisContext | None = None) -> dict: ...
+    def get_method_diagnosis(self, trades: list[dict], ctx: AnalysisContext | None = None) -> dict: ...
 
 
 _REGISTRY: dict[str, StyleAnalyzerProtocol] = {}
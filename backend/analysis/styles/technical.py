@@ -1,9 +1,10 @@
 """Technical Analyzer - for chart/indicator-based trading style.
 
 When market_context K-line data is available (via Data Service enrichment),
-performs real signal verification: MA crossovers, price vs MA position,
-volume confirmation, etc. Falls back to keyword-based heuristics when
-K-line data is unavailable.
+performs real signal verification: MA/MACD/KDJ crossovers, price vs MA
+position, RSI extremes, Bollinger band edges, volume confirmation, etc.
+(indicators from analysis.indicators, computed once per symbol and window).
+Falls back to keyword-based heuristics when K-line data is unavailable.
 
 Focuses on:
 - Signal consistency: entries/exits based on preset signals vs. impulsive
@@ -11,13 +12,23 @@ Focuses on:
 - Indicator stability: consistent use of indicator combinations
 - Timeframe consistency: decisions on the planned timeframe
 - Method dimension: system signal adherence score
+
+Signal keywords are matched once per entry reason into categories (see
+analysis.keywords), which select the verification checks. Batch metrics read
+per-trade values (keyword hits, strategy tags, signal verification, exit
+analysis) through the run's AnalysisContext, so the method diagnosis reuses
+the batch metrics instead of verifying every trade again.
 """
 
 from __future__ import annotations
 
 from collections import Counter
-from typing import Any
+from itertools import chain
+from typing import Any, NamedTuple, Sequence
 
+from ..context import AnalysisContext
+from ..indicators import Indicators, crossed_above, crossed_below, indicators_for, last
+from ..keywords import KeywordHits, KeywordMatcher
 from . import register
 
 
@@ -28,7 +39,8 @@ class TechnicalAnalyzer:
         result: dict[str, Any] = {}
 
         entry_reason = trade.get("entry_reason", "")
-        result["has_signal_reference"] = _has_signal_keywords(entry_reason)
+        hits = _SIGNAL_MATCHER.match(entry_reason)
+        result["has_signal_reference"] = bool(hits)
 
         tags = trade.get("tags", [])
         result["tagged_strategy"] = any(_is_strategy_tag(t) for t in tags)
@@ -44,7 +56,7 @@ class TechnicalAnalyzer:
             klines = mkt.get("klines_during", [])
             klines_before = mkt.get("klines_before", [])
             verification = _verify_entry_signal(
-                trade, klines_before + klines, entry_reason
+                trade, klines_before + klines, entry_reason, hits
             )
             result["signal_verification"] = verification
             result["signal_verified"] = verification.get("verified", False)
@@ -59,22 +71,19 @@ class TechnicalAnalyzer:
         result["method_score"] = self._single_method_score(result)
         return result
 
-    def analyze_batch(self, trades: list[dict], period: dict) -> dict:
+    def analyze_batch(self, trades: list[dict], period: dict, ctx: AnalysisContext | None = None) -> dict:
+        if ctx is None:
+            ctx = AnalysisContext(trades)
+        return ctx.result("technical.batch", lambda: self._analyze_batch(trades, ctx))
+
+    def _analyze_batch(self, trades: list[dict], ctx: AnalysisContext) -> dict:
         if not trades:
             return _empty_batch()
 
-        signal_refs = sum(
-            1 for t in trades
-            if _has_signal_keywords(t.get("entry_reason", ""))
-        )
+        signal_refs = sum(1 for t in trades if _signal_hits(t, ctx))
         signal_consistency = signal_refs / len(trades) if trades else 0.0
 
-        strategy_tags: list[str] = []
-        for t in trades:
-            for tag in t.get("tags", []):
-                if _is_strategy_tag(tag):
-                    strategy_tags.append(tag)
-        tag_dist = dict(Counter(strategy_tags))
+        tag_dist = dict(Counter(chain.from_iterable(_strategy_tags(t, ctx) for t in trades)))
         unique_strategies = len(tag_dist)
 
         indicator_stability = 1.0
@@ -100,9 +109,7 @@ class TechnicalAnalyzer:
             mkt = t.get("market_context", {})
             if mkt.get("data_available"):
                 verifiable_count += 1
-                klines = mkt.get("klines_before", []) + mkt.get("klines_during", [])
-                v = _verify_entry_signal(t, klines, t.get("entry_reason", ""))
-                if v.get("verified"):
+                if _verification(t, ctx).get("verified"):
                     verified_count += 1
 
         signal_verification_rate = (
@@ -115,8 +122,7 @@ class TechnicalAnalyzer:
             mkt = t.get("market_context", {})
             if mkt.get("data_available") and t.get("exit_price"):
                 exit_analyzed += 1
-                ea = _analyze_exit_quality(t, mkt)
-                if ea.get("premature_exit"):
+                if _exit_analysis(t, ctx).get("premature_exit"):
                     premature_exits += 1
 
         premature_exit_rate = (
@@ -138,8 +144,8 @@ class TechnicalAnalyzer:
             ), 1),
         }
 
-    def get_method_diagnosis(self, trades: list[dict]) -> dict:
-        batch = self.analyze_batch(trades, {})
+    def get_method_diagnosis(self, trades: list[dict], ctx: AnalysisContext | None = None) -> dict:
+        batch = self.analyze_batch(trades, {}, ctx)
 
         issues: list[str] = []
         strengths: list[str] = []
@@ -228,31 +234,74 @@ class TechnicalAnalyzer:
         return min(5.0, max(1.0, score))
 
 
+# ---------------------------------------------------------------------------
+# Per-trade values memoized in the run's AnalysisContext
+# ---------------------------------------------------------------------------
+
+def _signal_hits(trade: dict, ctx: AnalysisContext) -> KeywordHits:
+    return ctx.trade_value(
+        "technical.signal_keywords", trade,
+        lambda: _SIGNAL_MATCHER.match(trade.get("entry_reason", "")),
+    )
+
+
+def _strategy_tags(trade: dict, ctx: AnalysisContext) -> list[str]:
+    return ctx.trade_value(
+        "technical.strategy_tags", trade,
+        lambda: [tag for tag in trade.get("tags", []) if _is_strategy_tag(tag)],
+    )
+
+
+def _verification(trade: dict, ctx: AnalysisContext) -> dict:
+    def compute() -> dict:
+        mkt = trade.get("market_context", {})
+        klines = mkt.get("klines_before", []) + mkt.get("klines_during", [])
+        return _verify_entry_signal(trade, klines, trade.get("entry_reason", ""), _signal_hits(trade, ctx))
+
+    return ctx.trade_value("technical.signal_verification", trade, compute)
+
+
+def _exit_analysis(trade: dict, ctx: AnalysisContext) -> dict:
+    return ctx.trade_value(
+        "technical.exit_analysis", trade,
+        lambda: _analyze_exit_quality(trade, trade.get("market_context", {})),
+    )
+
+
 # ---------------------------------------------------------------------------
 # Signal verification using actual K-line data
 # ---------------------------------------------------------------------------
 
 def _verify_entry_signal(
     trade: dict,
-    klines: list[dict],
+    klines: Any,
     entry_reason: str,
+    hits: KeywordHits | None = None,
 ) -> dict:
-    """Verify whether the claimed entry signal existed in the K-line data."""
+    """Verify whether the claimed entry signal existed in the K-line data.
+
+    hits: the entry reason's signal keywords, if already matched.
+    """
     if not klines or len(klines) < 5:
         return {"available": False, "verified": None}
 
-    closes = [k["close"] for k in klines]
+    if hits is None:
+        hits = _SIGNAL_MATCHER.match(entry_reason)
+    categories = hits.categories
+
+    bars = _columns(klines)
+    ind = _indicators(trade, klines, bars)
     entry_price = trade.get("entry_price", 0)
     checks: dict[str, Any] = {"available": True, "signals_checked": []}
 
     any_verified = False
 
-    if any(kw in entry_reason for kw in ("均线", "MA", "金叉", "死叉")):
-        ma5 = _sma(closes, 5)
-        ma10 = _sma(closes, 10)
-        ma20 = _sma(closes, 20)
+    if "MA" in categories:
+        ma5 = last(ind.sma(5))
+        ma10 = last(ind.sma(10))
+        ma20 = last(ind.sma(20))
         if ma5 is not None and ma10 is not None:
-            golden_cross = ma5 > ma10 and (len(closes) >= 6 and _sma(closes[:-1], 5) <= _sma(closes[:-1], 10))  # type: ignore
+            golden_cross = crossed_above(ind.sma(5), ind.sma(10))
             checks["ma_cross"] = {
                 "ma5": round(ma5, 2), "ma10": round(ma10, 2),
                 "ma20": round(ma20, 2) if ma20 else None,
@@ -262,9 +311,9 @@ def _verify_entry_signal(
             if golden_cross or (trade.get("direction") == "LONG" and ma5 > ma10):
                 any_verified = True
 
-    if any(kw in entry_reason for kw in ("突破", "支撑", "阻力")):
-        recent_high = max(k["high"] for k in klines[-20:]) if len(klines) >= 20 else max(k["high"] for k in klines)
-        recent_low = min(k["low"] for k in klines[-20:]) if len(klines) >= 20 else min(k["low"] for k in klines)
+    if "breakout" in categories:
+        recent_high = max(bars.highs[-20:])
+        recent_low = min(bars.lows[-20:])
         checks["breakout"] = {
             "recent_high": round(recent_high, 2),
             "recent_low": round(recent_low, 2),
@@ -278,9 +327,9 @@ def _verify_entry_signal(
         elif direction == "SHORT" and entry_price <= recent_low * 1.02:
             any_verified = True
 
-    if any(kw in entry_reason for kw in ("放量", "缩量", "量能", "量价")):
-        if klines and all("volume" in k for k in klines):
-            volumes = [k["volume"] for k in klines]
+    if "volume" in categories:
+        if bars.volumes is not None:
+            volumes = bars.volumes
             avg_vol = sum(volumes[:-1]) / len(volumes[:-1]) if len(volumes) > 1 else volumes[0]
             last_vol = volumes[-1]
             vol_ratio = last_vol / avg_vol if avg_vol > 0 else 1.0
@@ -291,13 +340,63 @@ def _verify_entry_signal(
                 "is_high_volume": vol_ratio > 1.5,
             }
             checks["signals_checked"].append("volume")
-            if "放量" in entry_reason and vol_ratio > 1.5:
+            if "放量" in hits.keywords and vol_ratio > 1.5:
                 any_verified = True
-            elif "缩量" in entry_reason and vol_ratio < 0.7:
+            elif "缩量" in hits.keywords and vol_ratio < 0.7:
                 any_verified = True
 
+    long = trade.get("direction", "LONG") == "LONG"
+
+    if "MACD" in categories and len(ind) >= 26:
+        dif, dea, hist = ind.macd()
+        golden = any(crossed_above(dif, dea, i) for i in _RECENT_BARS)
+        dead = any(crossed_below(dif, dea, i) for i in _RECENT_BARS)
+        checks["macd"] = {
+            "dif": round(dif[-1], 4), "dea": round(dea[-1], 4), "histogram": round(hist[-1], 4),
+            "golden_cross_recent": golden, "dead_cross_recent": dead,
+        }
+        checks["signals_checked"].append("MACD")
+        if (golden or dif[-1] > dea[-1]) if long else (dead or dif[-1] < dea[-1]):
+            any_verified = True
+
+    if "KDJ" in categories and len(ind) >= 9:
+        k, d, j = ind.kdj()
+        golden = any(crossed_above(k, d, i) for i in _RECENT_BARS)
+        dead = any(crossed_below(k, d, i) for i in _RECENT_BARS)
+        checks["kdj"] = {
+            "k": round(k[-1], 2), "d": round(d[-1], 2), "j": round(j[-1], 2),
+            "golden_cross_recent": golden, "dead_cross_recent": dead,
+        }
+        checks["signals_checked"].append("KDJ")
+        if (golden or k[-1] > d[-1]) if long else (dead or k[-1] < d[-1]):
+            any_verified = True
+
+    if "RSI" in categories and len(ind) >= 14 + len(_RECENT_BARS):
+        recent = ind.rsi(14)[-len(_RECENT_BARS):]
+        checks["rsi"] = {
+            "rsi14": round(recent[-1], 2),
+            "oversold_recent": min(recent) <= 30,
+            "overbought_recent": max(recent) >= 70,
+        }
+        checks["signals_checked"].append("RSI")
+        if checks["rsi"]["oversold_recent"] if long else checks["rsi"]["overbought_recent"]:
+            any_verified = True
+
+    if "BOLL" in categories and len(ind) >= 20:
+        middle, upper, lower = ind.boll(20)
+        near_upper = entry_price >= upper[-1] * 0.98
+        near_lower = entry_price <= lower[-1] * 1.02
+        checks["boll"] = {
+            "middle": round(middle[-1], 2), "upper": round(upper[-1], 2), "lower": round(lower[-1], 2),
+            "entry_near_upper": near_upper, "entry_near_lower": near_lower,
+        }
+        checks["signals_checked"].append("BOLL")
+        # band-edge entries: a bounce off one band or a breakout through the other
+        if near_upper or near_lower:
+            any_verified = True
+
     if not checks["signals_checked"]:
-        if _has_signal_keywords(entry_reason):
+        if hits:
             checks["signals_checked"].append("keyword_only")
             any_verified = True
 
@@ -313,7 +412,7 @@ def _analyze_exit_quality(trade: dict, market_context: dict) -> dict:
 
     exit_price = trade["exit_price"]
     direction = trade.get("direction", "LONG")
-    post_prices = [k["close"] for k in klines_after]
+    post_prices = _columns(klines_after).closes
 
     if direction == "LONG":
         max_post = max(post_prices) if post_prices else exit_price
@@ -332,32 +431,71 @@ def _analyze_exit_quality(trade: dict, market_context: dict) -> dict:
     }
 
 
-def _sma(values: list[float], period: int) -> float | None:
-    """Simple moving average of the last `period` values."""
-    if len(values) < period:
-        return None
-    return sum(values[-period:]) / period
+class _Bars(NamedTuple):
+    closes: Sequence[float]
+    highs: Sequence[float]
+    lows: Sequence[float]
+    volumes: Sequence[float] | None
 
 
-_SIGNAL_KEYWORDS = {
-    "均线", "MA", "MACD", "KDJ", "RSI", "布林", "BOLL",
-    "突破", "支撑", "阻力", "金叉", "死叉", "背离",
-    "形态", "头肩", "双底", "双顶", "三角", "旗形",
-    "量能", "放量", "缩量", "量价",
-    "趋势线", "通道", "斐波那契",
-}
+def _columns(klines: Any) -> Any:
+    """Column view of K-line bars.
 
+    KLineSeries from the Data Service already exposes closes/highs/lows/volumes
+    columns and is used as is; lists of bar dicts (JSON payloads, stored
+    snapshots) are converted once.
+    """
+    if hasattr(klines, "closes"):
+        return klines
+    return _Bars(
+        closes=[k["close"] for k in klines],
+        highs=[k["high"] for k in klines],
+        lows=[k["low"] for k in klines],
+        volumes=[k["volume"] for k in klines] if all("volume" in k for k in klines) else None,
+    )
 
-def _has_signal_keywords(text: str) -> bool:
-    return any(kw in text for kw in _SIGNAL_KEYWORDS)
 
+# Crossovers and extremes count if they happened on one of the last three bars.
+_RECENT_BARS = (-3, -2, -1)
 
-def _is_strategy_tag(tag: str) -> bool:
-    strategy_indicators = {
+
+def _indicators(trade: dict, klines: Any, bars: Any) -> Indicators:
+    """Indicator columns of the bars, shared across trades on the same symbol and window."""
+    if hasattr(klines, "days"):
+        first, last_day = klines.days[0], klines.days[-1]
+    else:
+        first, last_day = klines[0].get("date"), klines[-1].get("date")
+    symbol = trade.get("symbol")
+    key = (symbol, first, last_day, len(bars.closes)) if symbol and first and last_day else None
+    return indicators_for(key, bars.closes, bars.highs, bars.lows)
+
+
+# Signal keywords by category; the categories select the verification checks.
+_SIGNAL_CATEGORIES = {
+    "MA": ("均线", "MA", "金叉", "死叉"),
+    "MACD": ("MACD",),
+    "KDJ": ("KDJ",),
+    "RSI": ("RSI",),
+    "BOLL": ("布林", "BOLL"),
+    "breakout": ("突破", "支撑", "阻力"),
+    "divergence": ("背离",),
+    "pattern": ("形态", "头肩", "双底", "双顶", "三角", "旗形"),
+    "volume": ("量能", "放量", "缩量", "量价"),
+    "trendline": ("趋势线", "通道"),
+    "fibonacci": ("斐波那契",),
+}
+_SIGNAL_MATCHER = KeywordMatcher(_SIGNAL_CATEGORIES)
+
+_STRATEGY_MATCHER = KeywordMatcher({
+    "strategy": (
         "均线", "MACD", "突破", "回调", "趋势", "形态",
         "量价", "波段", "日线", "周线", "分时",
-    }
-    return any(s in tag for s in strategy_indicators)
+    ),
+})
+
+
+def _is_strategy_tag(tag: str) -> bool:
+    return _STRATEGY_MATCHER.search(tag)
 
 
 def _empty_batch() -> dict:
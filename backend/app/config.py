@@ -52,3 +52,32 @@ def get_llm_base_url() -> str | None:
 def get_llm_api_key() -> str | None:
     """LLM API key. None = use litellm env default (e.g. OPENAI_API_KEY)."""
     return get_llm_config().get("api_key") or None
+
+
+def get_market_data_config() -> dict[str, Any]:
+    """Market data settings: K-line cache location, provider tuning, etc."""
+    return _load_config().get("market_data") or {}
+
+
+def get_kline_cache_path() -> Path | None:
+    """SQLite file for the K-line cache (relative to backend/). None = caching disabled."""
+    path = get_market_data_config().get("kline_cache_path", "data/klines.sqlite3")
+    if not path:
+        return None
+    p = Path(path)
+    return p if p.is_absolute() else _CONFIG_PATH.parent / p
+
+
+def get_shared_cache_dir() -> Path | None:
+    """Directory of the cross-process memory-mapped series cache (relative to backend/). None = disabled."""
+    path = get_market_data_config().get("shared_cache_dir", "data/shared")
+    if not path:
+        return None
+    p = Path(path)
+    return p if p.is_absolute() else _CONFIG_PATH.parent / p
+
+
+def get_local_data_dir() -> Path:
+    """Root directory for LocalFileProvider (market_data.provider = "local")."""
+    p = Path(get_market_data_config().get("local_data_dir", "data/market"))
+    return p if p.is_absolute() else _CONFIG_PATH.parent / p
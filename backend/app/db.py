@@ -7,13 +7,14 @@ import json
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from .models import Base, ChecklistORM, ReviewORM, TradeORM
+from .models import Base, ChecklistORM, ReviewORM, TradeMetricBucketORM, TradeORM
 
 # 向后兼容：从 db 仍可 import ORM 与工具
 __all__ = [
     "Base",
     "ChecklistORM",
     "ReviewORM",
+    "TradeMetricBucketORM",
     "TradeORM",
     "SessionLocal",
     "dumps",
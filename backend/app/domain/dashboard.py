@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from datetime import date, datetime
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -24,4 +24,5 @@ class DashboardSummaryOut(BaseModel):
     stop_not_followed: int
     weekly_return_pct: float
     max_drawdown_pct: float
+    benchmark_return_pct: Optional[float] = None  # 同期大盘涨跌幅 (上证指数)，行情未加载时为空
     equity_curve: List[EquityPoint]
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -22,6 +24,16 @@ OPENAPI_TAGS = [
     {"name": "checklist", "description": "待办清单"},
 ]
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 后台预热行情数据源（akshare 导入、交易日历、基准指数），不阻塞启动
+    from data_service import warm_up
+
+    warm_up()
+    yield
+
+
 app = FastAPI(
     title="Vault API",
     description="交易日志系统后端。所有需鉴权接口请携带 Header: **X-User-Id**（缺省为 default）。",
@@ -30,6 +42,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
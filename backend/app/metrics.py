@@ -0,0 +1,161 @@
+"""按周/月的交易指标：增量维护的分桶累加器。
+
+每个用户的交易按入场日（北京时间）分到桶里，桶起点是该日所在周的周一与所在月的
+月初中较晚的一天，所以每个桶都落在同一周、同一月内：一周或一月的指标就是其中
+若干桶的 MetricAccumulator 合并，不必重读原始交易。
+
+- 只有写入方维护桶：create_trade / update_trade 在同一事务里调用
+  record_trade_change，按 (用户, 桶) 取事务级咨询锁后，已存在的桶做 O(1) 的增删，
+  不存在的桶由原始交易（含本事务尚未提交的改动）构建并插入。锁持有到提交，
+  所以并发写入方总能看到前一个写入方建好的桶，再在其上做增量；
+- 读取 (period_metrics) 只读：缺失的桶在内存里由原始交易临时构建，不保存。
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from analysis.accumulator import MetricAccumulator
+
+from .db import TradeMetricBucketORM, TradeORM, loads
+
+CN_TZ = ZoneInfo("Asia/Shanghai")
+
+
+def trade_metrics_input(t: TradeORM) -> dict[str, Any]:
+    """累加器需要的交易字段（entry_time 统一为 UTC，保证增删时键一致）。"""
+    return {
+        "id": t.id,
+        "status": t.status,
+        "direction": t.direction,
+        "entry_time": _utc(t.entry_time).isoformat() if t.entry_time else None,
+        "entry_price": t.entry_price,
+        "exit_price": t.exit_price,
+        "position_pct": t.position_pct,
+        "stop_loss": t.stop_loss,
+        "pnl_cny": t.pnl_cny,
+        "emotion_tags": loads(t.emotion_tags_json),
+        "rule_flags": loads(t.rule_flags_json),
+    }
+
+
+def bucket_start(day: date) -> date:
+    return max(day - timedelta(days=day.weekday()), day.replace(day=1))
+
+
+def period_range(period: str, day: date) -> tuple[date, date]:
+    """day 所在的自然周 (week) 或自然月 (month)，闭区间。"""
+    if period == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if period == "month":
+        start = day.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return start, next_month - timedelta(days=1)
+    raise ValueError(f"unknown period: {period}")
+
+
+def record_trade_change(db: Session, user_id: str, before: dict | None, after: dict | None) -> None:
+    """把一笔交易的变化 (before → after，新建时 before=None) 计入所在的桶，调用方负责 commit。"""
+    old_key = _bucket_of(before)
+    new_key = _bucket_of(after)
+    # 构建缺失的桶要查到本事务里这笔交易的新状态
+    db.flush()
+    # 固定加锁顺序，避免跨桶移动的两笔更新互相死锁
+    for key in sorted({k for k in (old_key, new_key) if k is not None}):
+        _lock_bucket(db, user_id, key)
+        row = _get_bucket(db, user_id, key)
+        if row is None:
+            acc = _build_bucket(db, user_id, key)
+            db.add(
+                TradeMetricBucketORM(
+                    user_id=user_id,
+                    bucket_start=key,
+                    data_json=json.dumps(acc.to_dict(), ensure_ascii=False),
+                    updated_at=datetime.now(timezone.utc),
+                )
+            )
+            continue
+        acc = MetricAccumulator.from_dict(json.loads(row.data_json))
+        if key == old_key:
+            acc.remove(before)
+        if key == new_key:
+            acc.add(after)
+        row.data_json = json.dumps(acc.to_dict(), ensure_ascii=False)
+        row.updated_at = datetime.now(timezone.utc)
+
+
+def period_metrics(db: Session, user_id: str, start: date, end: date) -> dict:
+    """[start, end] 内交易的 analysis.base 指标；start/end 应与周或月的边界对齐。"""
+    acc = MetricAccumulator()
+    for key in _bucket_starts(start, end):
+        acc.merge(_load_bucket(db, user_id, key))
+    return acc.metrics()
+
+
+def _load_bucket(db: Session, user_id: str, key: date) -> MetricAccumulator:
+    """只读：已保存的桶，或由原始交易临时构建（不保存，留给写入方）。"""
+    row = _get_bucket(db, user_id, key)
+    if row is not None:
+        return MetricAccumulator.from_dict(json.loads(row.data_json))
+    return _build_bucket(db, user_id, key)
+
+
+def _get_bucket(db: Session, user_id: str, key: date) -> TradeMetricBucketORM | None:
+    return (
+        db.query(TradeMetricBucketORM)
+        .filter(TradeMetricBucketORM.user_id == user_id, TradeMetricBucketORM.bucket_start == key)
+        .first()
+    )
+
+
+def _build_bucket(db: Session, user_id: str, key: date) -> MetricAccumulator:
+    return MetricAccumulator.from_trades(trade_metrics_input(r) for r in _bucket_trades(db, user_id, key))
+
+
+def _lock_bucket(db: Session, user_id: str, key: date) -> None:
+    """(用户, 桶) 的事务级咨询锁，提交或回滚时释放；桶行可能还不存在，所以不能用行锁。"""
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:user_id), :bucket_key)"),
+        {"user_id": user_id, "bucket_key": key.toordinal()},
+    )
+
+
+def _bucket_trades(db: Session, user_id: str, key: date) -> list[TradeORM]:
+    last = min(key + timedelta(days=6 - key.weekday()), period_range("month", key)[1])
+    start_dt = datetime.combine(key, time.min, tzinfo=CN_TZ).astimezone(timezone.utc)
+    end_dt = datetime.combine(last, time.max, tzinfo=CN_TZ).astimezone(timezone.utc)
+    return (
+        db.query(TradeORM)
+        .filter(TradeORM.user_id == user_id)
+        .filter(TradeORM.entry_time >= start_dt)
+        .filter(TradeORM.entry_time <= end_dt)
+        .order_by(TradeORM.entry_time.asc())
+        .all()
+    )
+
+
+def _bucket_starts(start: date, end: date) -> list[date]:
+    keys = []
+    day = start
+    while day <= end:
+        key = bucket_start(day)
+        keys.append(key)
+        day = min(key + timedelta(days=7 - key.weekday()), period_range("month", key)[1] + timedelta(days=1))
+    return keys
+
+
+def _bucket_of(trade: dict | None) -> date | None:
+    if not trade or not trade.get("entry_time"):
+        return None
+    return bucket_start(datetime.fromisoformat(trade["entry_time"]).astimezone(CN_TZ).date())
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
@@ -2,6 +2,7 @@
 
 from .base import Base
 from .checklist import ChecklistORM
+from .metric_bucket import TradeMetricBucketORM
 from .review import ReviewORM
 from .trade import TradeORM
 
@@ -9,5 +10,6 @@ __all__ = [
     "Base",
     "ChecklistORM",
     "ReviewORM",
+    "TradeMetricBucketORM",
     "TradeORM",
 ]
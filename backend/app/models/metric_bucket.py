@@ -0,0 +1,23 @@
+"""交易指标分桶表 ORM（见 app.metrics）."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class TradeMetricBucketORM(Base):
+    __tablename__ = "trade_metric_buckets"
+
+    user_id: Mapped[str] = mapped_column(String, primary_key=True)
+    # 周一与月初中较晚的一天：每个桶落在同一周且同一月内
+    bucket_start: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    # analysis.accumulator.MetricAccumulator.to_dict()
+    data_json: Mapped[str] = mapped_column(Text)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -5,7 +5,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, Float, String, Text
+from sqlalchemy import DateTime, Float, LargeBinary, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -40,6 +40,7 @@ class TradeORM(Base):
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     entry_snapshot_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    entry_snapshot_bin: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
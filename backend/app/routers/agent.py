@@ -12,6 +12,7 @@ from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from ..consts import AGENT_MODE, QUEUE_NAME, REDIS_URL, RESULT_PREFIX
@@ -22,6 +23,7 @@ from ..domain.agent import AnalyzerPayload, ChatPayload, RecorderPayload, Report
 from agent_runtime.executor import SandboxExecutor, ToolProxy
 from agent_runtime.queue import AgentTask, enqueue, get_result
 from agents.tools import register_all
+from agents.tools.common import load_entry_snapshot
 
 CN_TZ = ZoneInfo("Asia/Shanghai")
 router = APIRouter(prefix="/api/agent", tags=["agent"])
@@ -63,13 +65,17 @@ def run_recorder(
 
 
 @router.post("/analyzer/run")
-def run_analyzer(
+async def run_analyzer(
     payload: AnalyzerPayload,
     db: Session = Depends(get_db),
     user_id: str = Depends(get_current_user),
     async_mode: bool = Query(False, alias="async"),
 ):
-    """Run Analyzer in sandbox. Executor proxies: fetch trades and inject into payload."""
+    """Run Analyzer in sandbox. Executor proxies: fetch trades and inject into payload.
+
+    Async endpoint: blocking DB / sandbox calls go to the threadpool, and inline
+    market data enrichment awaits provider I/O instead of holding a worker.
+    """
     from datetime import date
 
     try:
@@ -81,16 +87,10 @@ def run_analyzer(
     start_dt = datetime.combine(range_start, datetime.min.time(), tzinfo=CN_TZ).astimezone(timezone.utc)
     end_dt = datetime.combine(range_end, datetime.max.time(), tzinfo=CN_TZ).astimezone(timezone.utc)
 
-    rows = (
-        db.query(TradeORM)
-        .filter(TradeORM.user_id == user_id)
-        .filter(TradeORM.entry_time >= start_dt)
-        .filter(TradeORM.entry_time <= end_dt)
-        .order_by(TradeORM.entry_time.asc())
-        .all()
-    )
-
-    trades = [_serialize_trade(r) for r in rows]
+    # Only inline runs enrich in-process and reuse the stored snapshots (kept
+    # columnar); the sandbox / queue payload never reads them, so it omits them.
+    inline = AGENT_MODE == AGENT_MODE_INLINE
+    trades = await run_in_threadpool(_load_trades, db, user_id, start_dt, end_dt, inline)
 
     task_payload = {
         "trades": trades,
@@ -100,10 +100,14 @@ def run_analyzer(
     }
 
     if AGENT_MODE == AGENT_MODE_INLINE:
+        from agents.tools.common import save_market_snapshots
         from analysis.engine import analyze
-        from data_service.service import enrich_trades
-        enriched = enrich_trades(trades)
-        result = analyze(
+        from data_service.service import enrich_trades_async
+        enriched = await enrich_trades_async(trades)
+        await run_in_threadpool(save_market_snapshots, user_id, enriched)
+        # CPU-bound: keep it off the event loop
+        result = await run_in_threadpool(
+            analyze,
             enriched,
             style=payload.style,
             analysis_type=payload.analysis_type,
@@ -114,9 +118,9 @@ def run_analyzer(
     task_id = str(uuid.uuid4())
     if async_mode and REDIS_URL:
         task = AgentTask(task_id=task_id, user_id=user_id, agent_type="analyzer", payload=task_payload)
-        enqueue(REDIS_URL, QUEUE_NAME, task)
+        await run_in_threadpool(enqueue, REDIS_URL, QUEUE_NAME, task)
         return {"task_id": task_id, "status": "queued"}
-    result = executor.spawn("analyzer", user_id, task_payload, task_id=task_id)
+    result = await run_in_threadpool(executor.spawn, "analyzer", user_id, task_payload, task_id=task_id)
     return result
 
 
@@ -158,8 +162,21 @@ def _run_agent(agent_type: str, user_id: str, payload: dict) -> dict:
     return executor.spawn(agent_type, user_id, payload, task_id=task_id)
 
 
-def _serialize_trade(r: TradeORM) -> dict:
-    return {
+def _load_trades(db: Session, user_id: str, start_dt: datetime, end_dt: datetime, with_snapshot: bool = False) -> list[dict]:
+    rows = (
+        db.query(TradeORM)
+        .filter(TradeORM.user_id == user_id)
+        .filter(TradeORM.entry_time >= start_dt)
+        .filter(TradeORM.entry_time <= end_dt)
+        .order_by(TradeORM.entry_time.asc())
+        .all()
+    )
+    return [_serialize_trade(r, with_snapshot) for r in rows]
+
+
+def _serialize_trade(r: TradeORM, with_snapshot: bool = False) -> dict:
+    """with_snapshot=True attaches the stored entry snapshot (columnar, not JSON-safe) for in-process enrichment."""
+    out = {
         "id": r.id,
         "symbol": r.symbol,
         "name": r.name,
@@ -179,3 +196,8 @@ def _serialize_trade(r: TradeORM) -> dict:
         "rule_flags": loads(r.rule_flags_json),
         "tags": loads(r.tags_json),
     }
+    if with_snapshot:
+        snapshot = load_entry_snapshot(r, columnar=True)
+        if snapshot:
+            out["entry_snapshot"] = snapshot
+    return out
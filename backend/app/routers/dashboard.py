@@ -3,12 +3,13 @@ from __future__ import annotations
 from datetime import datetime, date, timezone
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from ..db import TradeORM, loads
 from ..dependencies import get_current_user, get_db
 from ..domain.dashboard import DashboardSummaryOut, EquityPoint
+from ..metrics import period_metrics, period_range
 
 CN_TZ = ZoneInfo("Asia/Shanghai")
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
@@ -65,6 +66,7 @@ def dashboard_summary(
 
     weekly_return_pct = (equity - 100000.0) / 100000.0 * 100.0
     max_drawdown_pct = max_dd * 100.0
+    benchmark_return_pct = _benchmark_return_pct(range_start, range_end)
 
     return DashboardSummaryOut(
         range_start=range_start,
@@ -77,5 +79,33 @@ def dashboard_summary(
         stop_not_followed=stop_not_followed,
         weekly_return_pct=round(weekly_return_pct, 2),
         max_drawdown_pct=round(max_drawdown_pct, 2),
+        benchmark_return_pct=benchmark_return_pct,
         equity_curve=curve,
     )
+
+
+@router.get("/metrics")
+def dashboard_metrics(
+    period: str = "week",
+    day: date | None = None,
+    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+):
+    """day 所在自然周/月的基础指标（胜率、盈亏比、资金与心态诊断），由增量分桶合并得出。"""
+    if period not in ("week", "month"):
+        raise HTTPException(400, "period must be week or month")
+    range_start, range_end = period_range(period, day or datetime.now(CN_TZ).date())
+    return {
+        "period": period,
+        "range_start": range_start,
+        "range_end": range_end,
+        "metrics": period_metrics(db, user_id, range_start, range_end),
+    }
+
+
+def _benchmark_return_pct(range_start: date, range_end: date) -> float | None:
+    """同期基准涨跌幅；只用进程内已加载的指数数据，不等待网络。"""
+    from data_service import benchmark_returns
+
+    ret = benchmark_returns([(range_start.isoformat(), range_end.isoformat())], fetch=False)[0]
+    return round(ret * 100.0, 2) if ret is not None else None
@@ -5,4 +5,6 @@ router = APIRouter(tags=["health"])
 
 @router.get("/health")
 def health():
-    return {"ok": True}
+    from data_service import provider_health
+
+    return {"ok": True, "market_data": provider_health()}
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 
 from ..db import TradeORM, dumps
 from ..dependencies import get_current_user, get_db, utcnow
+from ..metrics import record_trade_change, trade_metrics_input
 from ..schemas import TradeCreate, TradeOut, TradeUpdate
 
 router = APIRouter(prefix="/api/trades", tags=["trades"])
@@ -75,6 +76,7 @@ def create_trade(
         updated_at=now,
     )
     db.add(r)
+    record_trade_change(db, user_id, None, trade_metrics_input(r))
     db.commit()
     return _fetch_trade(tid, db, user_id)
 
@@ -90,6 +92,7 @@ def update_trade(
     if not r:
         raise HTTPException(404, "trade not found")
 
+    before = trade_metrics_input(r)
     data = payload.model_dump(exclude_unset=True)
     for k, v in data.items():
         if k in {"emotion_tags", "rule_flags", "tags"} and v is not None:
@@ -104,6 +107,7 @@ def update_trade(
 
     r.updated_at = utcnow()
     db.add(r)
+    record_trade_change(db, user_id, before, trade_metrics_input(r))
     db.commit()
     return _fetch_trade(trade_id, db, user_id)
 
@@ -8,6 +8,22 @@ Responsibilities:
 - Enrich trade dicts with market_context before passing to Analysis Engine
 """
 
-from .service import enrich_trades, enrich_single_trade
+from .service import (
+    benchmark_returns,
+    enrich_single_trade,
+    enrich_trades,
+    enrich_trades_async,
+    get_klines,
+    provider_health,
+    warm_up,
+)
 
-__all__ = ["enrich_trades", "enrich_single_trade"]
+__all__ = [
+    "benchmark_returns",
+    "enrich_trades",
+    "enrich_trades_async",
+    "enrich_single_trade",
+    "get_klines",
+    "provider_health",
+    "warm_up",
+]
@@ -0,0 +1,178 @@
+"""Price adjustment (复权) computed locally from raw bars and adjustment factors.
+
+Forward-adjusted (qfq) prices of the whole history change with every dividend
+or split, so caching qfq bars means the cache goes stale at each corporate
+action. Instead the data layer keeps raw (unadjusted) bars, which never
+change, plus each symbol's backward-adjustment (hfq) factor table, and derives
+the adjusted view on read:
+
+    hfq price = raw price * hfq_factor(date)
+    qfq price = raw price * hfq_factor(date) / hfq_factor(latest)
+
+A corporate action adds one factor row; cached bars stay valid. Volumes are
+left unadjusted, as in AKShare's adjusted data.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime
+from operator import mul
+from typing import Any, Iterable, Sequence
+from zoneinfo import ZoneInfo
+
+from .market_data import MarketDataProvider, peek_klines
+from .series import KLineSeries
+
+logger = logging.getLogger(__name__)
+
+CN_TZ = ZoneInfo("Asia/Shanghai")
+ADJUST_MODES = ("qfq", "hfq", "")
+_ADJUSTED_COLUMNS = ("opens", "highs", "lows", "closes")
+
+
+class AdjustFactors:
+    """Step function of hfq factors: factors[i] applies from days[i] until the next row."""
+
+    __slots__ = ("days", "factors")
+
+    def __init__(self, days: Sequence[int], factors: Sequence[float]) -> None:
+        self.days = days
+        self.factors = factors
+
+    @classmethod
+    def empty(cls) -> AdjustFactors:
+        return cls(array("q"), array("d"))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[Any, float]]) -> AdjustFactors:
+        """Build from (date, hfq_factor) pairs in any order; dates may be ISO strings or dates."""
+        pairs = sorted((_ordinal(d), float(f)) for d, f in rows)
+        return cls(array("q", (d for d, _ in pairs)), array("d", (f for _, f in pairs)))
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __bool__(self) -> bool:
+        return len(self.days) > 0
+
+    def rows(self) -> list[tuple[str, float]]:
+        return [(date.fromordinal(d).isoformat(), f) for d, f in zip(self.days, self.factors)]
+
+    def apply(self, series: KLineSeries, adjust: str = "qfq") -> KLineSeries:
+        """Adjusted copy of a raw series ("qfq", "hfq"; "" returns it unchanged)."""
+        if adjust not in ADJUST_MODES:
+            raise ValueError(f"unsupported adjust mode {adjust!r}")
+        if not adjust or not self or not series:
+            return series
+        scale = self._per_bar(series.days)
+        if adjust == "qfq":
+            latest = self.factors[-1]
+            scale = array("d", (f / latest for f in scale))
+        return KLineSeries(
+            series.days,
+            *(array("d", map(mul, getattr(series, name), scale)) for name in _ADJUSTED_COLUMNS),
+            series.volumes,
+            series.turnovers,
+        )
+
+    def _per_bar(self, days: Sequence[int]) -> array:
+        """Factor in effect on each bar's date (bars before the first row use 1.0)."""
+        out = array("d")
+        i = bisect_right(self.days, days[0]) - 1 if days else 0
+        for d in days:
+            while i + 1 < len(self.days) and self.days[i + 1] <= d:
+                i += 1
+            out.append(self.factors[i] if i >= 0 else 1.0)
+        return out
+
+
+class AdjustingProvider:
+    """MarketDataProvider that serves adjusted K-lines from a raw-bar provider.
+
+    The wrapped provider returns raw bars and, via get_adjust_factors(), the
+    symbol's factor table (asked for at most once a day per symbol, and again
+    when a bar newer than the last lookup comes in). Providers without factors
+    (e.g. local files, which hold adjusted data already) are passed through
+    unchanged.
+
+    When a symbol's factors are unknown (source down, never loaded) its bars
+    come back empty, i.e. unavailable: raw bars would mix a second price scale
+    into contexts, snapshots and indicators built from adjusted ones.
+    """
+
+    def __init__(self, provider: MarketDataProvider, adjust: str = "qfq") -> None:
+        self.provider = provider
+        self.adjust = adjust
+        # symbol -> (day looked up, newest bar day it was asked for, factors)
+        self._factors: dict[str, tuple[str, int, AdjustFactors]] = {}
+        self._lock = threading.Lock()
+
+    def get_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        raw = self.provider.get_klines(symbol, start_date, end_date, period)
+        if not raw or not self.adjust:
+            return raw
+        factors = self.get_adjust_factors(symbol, raw.days[-1])
+        if factors is None:
+            logger.warning("no adjustment factors for %s, bars unavailable", symbol)
+            return KLineSeries.empty()
+        return factors.apply(raw, self.adjust)
+
+    def get_index_klines(
+        self,
+        index_code: str,
+        start_date: str,
+        end_date: str,
+    ) -> KLineSeries:
+        return self.provider.get_index_klines(index_code, start_date, end_date)
+
+    def peek_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        """Adjusted view of locally available bars, using only locally known factors."""
+        raw = peek_klines(self.provider, symbol, start_date, end_date, period)
+        if not raw or not self.adjust:
+            return raw
+        with self._lock:
+            cached = self._factors.get(symbol.strip().upper())
+        factors = cached[2] if cached is not None else None
+        if factors is None:
+            peek_factors = getattr(self.provider, "peek_adjust_factors", None)
+            factors = peek_factors(symbol) if peek_factors is not None else AdjustFactors.empty()
+        return factors.apply(raw, self.adjust) if factors is not None else KLineSeries.empty()
+
+    def get_adjust_factors(self, symbol: str, through: int = 0) -> AdjustFactors | None:
+        """Factor table for adjusting bars up to day ordinal `through` (None if unknown)."""
+        fetch = getattr(self.provider, "get_adjust_factors", None)
+        if fetch is None:
+            return AdjustFactors.empty()
+        symbol = symbol.strip().upper()
+        today = datetime.now(CN_TZ).date().isoformat()
+        with self._lock:
+            cached = self._factors.get(symbol)
+        if cached is not None and cached[0] == today and through <= cached[1]:
+            return cached[2]
+        factors = fetch(symbol)
+        if factors is not None:
+            with self._lock:
+                self._factors[symbol] = (today, through, factors)
+        return factors
+
+
+def _ordinal(value: Any) -> int:
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
@@ -0,0 +1,360 @@
+"""Persistent K-line cache - wraps any MarketDataProvider with a local SQLite store.
+
+Daily bars for past dates never change, so every fetched bar is written to disk
+together with the date range it came from. Later requests only go to the
+upstream provider for the parts of the range that are not covered yet; covered
+ranges are merged so the store stays a handful of intervals per symbol.
+Ranges with no trading day (weekends, holidays, per the trading calendar) are
+recorded as covered without a fetch; an empty answer over trading days may be
+a failure, so it is not.
+
+Bars dated after the last closed session are never cached: during trading
+hours today's bar is still forming, so the open edge of a range is fetched
+live. Once the market has closed (15:00 Asia/Shanghai) today's bar is final
+and is cached like any other, so the post-close prefetch warms it too.
+
+Bars are stored unadjusted, together with each symbol's adjustment-factor
+table, so dividends never invalidate cached history; see data_service.adjust.
+The table is refreshed only once a bar newer than its last refresh has been
+served, so reads answered entirely from the cache make no remote call.
+
+With a SharedSeriesStore attached, each symbol's stored bars are also
+published as a memory-mapped mirror, so every process on the node reads
+covered ranges zero-copy instead of querying SQLite and building its own
+arrays (see data_service.shared_cache). The mirror is republished once per
+fill, after all of its ranges are stored, not on every store().
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from itertools import repeat
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from .adjust import AdjustFactors
+from .market_data import MarketDataProvider
+from .series import KLineSeries
+from .shared_cache import SharedSeriesStore
+from .trading_calendar import get_trading_calendar
+
+logger = logging.getLogger(__name__)
+
+CN_TZ = ZoneInfo("Asia/Shanghai")
+MARKET_CLOSE = "15:00"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS klines (
+    symbol   TEXT NOT NULL,
+    period   TEXT NOT NULL,
+    date     TEXT NOT NULL,
+    open     REAL NOT NULL,
+    high     REAL NOT NULL,
+    low      REAL NOT NULL,
+    close    REAL NOT NULL,
+    volume   REAL NOT NULL,
+    turnover REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (symbol, period, date)
+);
+CREATE TABLE IF NOT EXISTS kline_ranges (
+    symbol     TEXT NOT NULL,
+    period     TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date   TEXT NOT NULL,
+    PRIMARY KEY (symbol, period, start_date)
+);
+CREATE TABLE IF NOT EXISTS adjust_factors (
+    symbol TEXT NOT NULL,
+    date   TEXT NOT NULL,
+    factor REAL NOT NULL,
+    PRIMARY KEY (symbol, date)
+);
+CREATE TABLE IF NOT EXISTS adjust_factor_refreshes (
+    symbol       TEXT PRIMARY KEY,
+    refreshed_on TEXT NOT NULL
+);
+"""
+
+# 1: bars are stored unadjusted (version 0 caches held qfq prices and are dropped)
+_SCHEMA_VERSION = 1
+
+
+class KLineCache:
+    """SQLite-backed store of daily bars plus the date ranges already fetched."""
+
+    def __init__(self, path: str | Path, shared: SharedSeriesStore | None = None) -> None:
+        self.path = Path(path)
+        self.shared = shared
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < _SCHEMA_VERSION:
+            with self._conn:
+                self._conn.execute("DELETE FROM klines")
+                self._conn.execute("DELETE FROM kline_ranges")
+                self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def covered_ranges(self, symbol: str, period: str) -> list[tuple[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT start_date, end_date FROM kline_ranges"
+                " WHERE symbol = ? AND period = ? ORDER BY start_date",
+                (symbol, period),
+            ).fetchall()
+        return [(s, e) for s, e in rows]
+
+    def missing_ranges(self, symbol: str, period: str, start_date: str, end_date: str) -> list[tuple[str, str]]:
+        """Sub-ranges of [start_date, end_date] not covered by earlier fetches."""
+        if start_date > end_date:
+            return []
+        missing: list[tuple[str, str]] = []
+        cursor = start_date
+        for s, e in self.covered_ranges(symbol, period):
+            if e < cursor:
+                continue
+            if s > end_date:
+                break
+            if s > cursor:
+                missing.append((cursor, _shift(s, -1)))
+            cursor = max(cursor, _shift(e, 1))
+            if cursor > end_date:
+                return missing
+        missing.append((cursor, end_date))
+        return missing
+
+    def load(self, symbol: str, period: str, start_date: str, end_date: str) -> KLineSeries:
+        if self.shared is not None:
+            mirror = self.shared.get(_mirror_key(symbol, period))
+            if mirror is not None and mirror.covers(start_date, end_date):
+                return mirror.series.between(start_date, end_date)
+        result = self._load_rows(symbol, period, start_date, end_date)
+        if self.shared is not None and not self.missing_ranges(symbol, period, start_date, end_date):
+            self._publish_mirror(symbol, period)
+        return result
+
+    def _load_rows(self, symbol: str, period: str, start_date: str, end_date: str) -> KLineSeries:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, open, high, low, close, volume, turnover FROM klines"
+                " WHERE symbol = ? AND period = ? AND date >= ? AND date <= ? ORDER BY date",
+                (symbol, period, start_date, end_date),
+            ).fetchall()
+        return KLineSeries.from_rows(rows)
+
+    def _publish_mirror(self, symbol: str, period: str) -> None:
+        """Publish all stored bars of symbol to the shared store, tagged with the covered ranges."""
+        # Ranges are read before bars: a concurrent store() commits both together,
+        # so the mirror may under-report coverage but never claims bars it lacks.
+        ranges = self.covered_ranges(symbol, period)
+        bars = self._load_rows(symbol, period, "0001-01-01", "9999-12-31")
+        try:
+            self.shared.publish(_mirror_key(symbol, period), bars, ranges=ranges)
+        except OSError as e:
+            logger.warning("could not publish %s %s to the shared cache: %s", symbol, period, e)
+
+    def publish(self, symbol: str, period: str) -> None:
+        """Republish the symbol's shared mirror after store() calls (no-op without a shared store)."""
+        if self.shared is not None:
+            self._publish_mirror(symbol, period)
+
+    def store(self, symbol: str, period: str, start_date: str, end_date: str, klines: KLineSeries) -> None:
+        """Save bars and mark [start_date, end_date] as covered, merging adjacent ranges.
+
+        The shared mirror is not updated; call publish() once the batch is stored.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO klines"
+                " (symbol, period, date, open, high, low, close, volume, turnover)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                zip(
+                    repeat(symbol), repeat(period), klines.dates,
+                    klines.opens, klines.highs, klines.lows, klines.closes, klines.volumes, klines.turnovers,
+                ),
+            )
+            overlapping = self._conn.execute(
+                "SELECT start_date, end_date FROM kline_ranges"
+                " WHERE symbol = ? AND period = ? AND start_date <= ? AND end_date >= ?",
+                (symbol, period, _shift(end_date, 1), _shift(start_date, -1)),
+            ).fetchall()
+            for s, e in overlapping:
+                start_date = min(start_date, s)
+                end_date = max(end_date, e)
+            self._conn.execute(
+                "DELETE FROM kline_ranges"
+                " WHERE symbol = ? AND period = ? AND start_date >= ? AND end_date <= ?",
+                (symbol, period, start_date, end_date),
+            )
+            self._conn.execute(
+                "INSERT INTO kline_ranges (symbol, period, start_date, end_date) VALUES (?, ?, ?, ?)",
+                (symbol, period, start_date, end_date),
+            )
+
+    def load_factors(self, symbol: str) -> tuple[AdjustFactors, str]:
+        """Stored factor table of a symbol and the day it was last refreshed ("" if never)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, factor FROM adjust_factors WHERE symbol = ? ORDER BY date", (symbol,)
+            ).fetchall()
+            refreshed = self._conn.execute(
+                "SELECT refreshed_on FROM adjust_factor_refreshes WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return AdjustFactors.from_rows(rows), refreshed[0] if refreshed else ""
+
+    def store_factors(self, symbol: str, factors: AdjustFactors, refreshed_on: str) -> None:
+        """Upsert a symbol's factor rows; unchanged rows are rewritten in place."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO adjust_factors (symbol, date, factor) VALUES (?, ?, ?)",
+                ((symbol, d, f) for d, f in factors.rows()),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO adjust_factor_refreshes (symbol, refreshed_on) VALUES (?, ?)",
+                (symbol, refreshed_on),
+            )
+
+
+class CachedProvider:
+    """MarketDataProvider that serves past bars from a KLineCache.
+
+    Only the missing edges of a requested range are fetched from the wrapped
+    provider. Adjustment factors are kept in the cache and refreshed from the
+    wrapped provider when a bar newer than the stored table has been served
+    (a new bar may follow a new corporate action). Index K-lines are passed
+    through unchanged.
+    """
+
+    def __init__(self, provider: MarketDataProvider, cache: KLineCache) -> None:
+        self.provider = provider
+        self.cache = cache
+        # symbol -> newest bar day (ordinal) served by get_klines
+        self._newest: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        symbol = symbol.strip().upper()
+        cacheable_end = min(end_date, _last_closed_day())
+
+        shared = self.cache.shared
+        if shared is not None and self.cache.missing_ranges(symbol, period, start_date, cacheable_end):
+            # One process fills the gap; the others wait and find it covered.
+            with shared.refreshing(_mirror_key(symbol, period)):
+                self._fill(symbol, period, start_date, cacheable_end)
+        else:
+            self._fill(symbol, period, start_date, cacheable_end)
+
+        result = self.cache.load(symbol, period, start_date, cacheable_end)
+        if end_date > cacheable_end:
+            live_start = max(start_date, _shift(cacheable_end, 1))
+            result = result + self.provider.get_klines(symbol, live_start, end_date, period)
+        if result and period == "daily":
+            with self._lock:
+                self._newest[symbol] = max(self._newest.get(symbol, 0), result.days[-1])
+        return result
+
+    def _fill(self, symbol: str, period: str, start_date: str, end_date: str) -> None:
+        stored = False
+        for s, e in self.cache.missing_ranges(symbol, period, start_date, end_date):
+            if not get_trading_calendar().has_trading_day(s, e):
+                # A weekend or holiday gap has no bars: cover it without asking upstream.
+                self.cache.store(symbol, period, s, e, KLineSeries.empty())
+                stored = True
+                continue
+            klines = self.provider.get_klines(symbol, s, e, period)
+            # Providers report failures as an empty series too, so an empty result
+            # over trading days is not recorded as covered; it is retried next time.
+            if not klines:
+                continue
+            today = _today()
+            if e >= today and klines.days[-1] < date.fromisoformat(today).toordinal():
+                # The source has not published today's bar yet: cover through yesterday only.
+                e = _shift(today, -1)
+                if e < s:
+                    continue
+            self.cache.store(symbol, period, s, e, klines)
+            stored = True
+        if stored:
+            self.cache.publish(symbol, period)
+
+    def get_index_klines(
+        self,
+        index_code: str,
+        start_date: str,
+        end_date: str,
+    ) -> KLineSeries:
+        return self.provider.get_index_klines(index_code, start_date, end_date)
+
+    def peek_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        """Whatever cached bars fall in the range; never calls the wrapped provider."""
+        return self.cache.load(symbol.strip().upper(), period, start_date, end_date)
+
+    def peek_adjust_factors(self, symbol: str) -> AdjustFactors | None:
+        factors, refreshed_on = self.cache.load_factors(symbol.strip().upper())
+        return factors if refreshed_on else None
+
+    def get_adjust_factors(self, symbol: str) -> AdjustFactors | None:
+        symbol = symbol.strip().upper()
+        factors, refreshed_on = self.cache.load_factors(symbol)
+        with self._lock:
+            newest = self._newest.get(symbol, 0)
+        if refreshed_on and newest <= date.fromisoformat(refreshed_on).toordinal():
+            return factors
+        fresh = self.provider.get_adjust_factors(symbol)
+        if fresh is None:
+            # Source unavailable: yesterday's table is still right for all but a brand-new action.
+            return factors if refreshed_on else None
+        self.cache.store_factors(symbol, fresh, _today())
+        return fresh
+
+
+_caches: dict[Path, KLineCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_kline_cache(path: str | Path, shared: SharedSeriesStore | None = None) -> KLineCache:
+    """Process-wide KLineCache for a given file (one SQLite connection per path)."""
+    key = Path(path).resolve()
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = KLineCache(key, shared)
+        elif shared is not None:
+            cache.shared = shared
+        return cache
+
+
+def _mirror_key(symbol: str, period: str) -> str:
+    return f"klines/{symbol}/{period}"
+
+
+def _today() -> str:
+    return datetime.now(CN_TZ).date().isoformat()
+
+
+def _last_closed_day() -> str:
+    """Latest day whose daily bar is final: today after the close, otherwise yesterday."""
+    now = datetime.now(CN_TZ)
+    today = now.date().isoformat()
+    return today if now.strftime("%H:%M") >= MARKET_CLOSE else _shift(today, -1)
+
+
+def _shift(date_str: str, days: int) -> str:
+    return (date.fromisoformat(date_str) + timedelta(days=days)).isoformat()
@@ -0,0 +1,151 @@
+"""Compact binary encoding of stored market snapshots (trades.entry_snapshot_bin).
+
+A market_context stored as JSON repeats every key of every bar and has to be
+parsed dict by dict. The binary form keeps the bars column-wise, the way
+KLineSeries holds them, and decodes straight back into one:
+
+    header  "<4sBBH"    magic b"VKSN", version, compression, reserved
+    body    (optionally zlib / zstd compressed)
+      meta  "<dBxxxiiIIIq"  benchmark_return (NaN = None), data_available,
+                            coverage from/through (date ordinals, 0 = none),
+                            bar counts before / during / after, first day ordinal
+      open, high, low, close, volume, turnover   float64[n] each
+      days  uint32[n - 1]  gaps between consecutive bar dates
+
+zstd needs the optional `zstandard` package; without it encoding falls back to
+zlib. read_stored_snapshot() also accepts the legacy entry_snapshot_json text.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+import zlib
+from array import array
+from datetime import date
+from itertools import accumulate
+from typing import Any
+
+from .enrichment import context_to_dict
+from .series import KLineSeries
+
+_MAGIC = b"VKSN"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBH")
+_META = struct.Struct("<dBxxxiiIIIq")
+_FLOAT_COLUMNS = ("opens", "highs", "lows", "closes", "volumes", "turnovers")
+_PARTS = ("klines_before", "klines_during", "klines_after_exit")
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+_COMPRESSION_CODES = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "zstd": COMPRESSION_ZSTD}
+
+
+def encode_snapshot(context: dict, compression: str = "zlib") -> bytes:
+    """Encode a market_context (KLineSeries or bar-dict windows) as a snapshot blob."""
+    parts = [_as_series(context.get(key)) for key in _PARTS]
+    bars = parts[0] + parts[1] + parts[2]
+    n = len(bars)
+    benchmark_return = context.get("benchmark_return")
+    coverage = context.get("coverage") or ("", "")
+    meta = _META.pack(
+        math.nan if benchmark_return is None else float(benchmark_return),
+        1 if context.get("data_available") else 0,
+        _ordinal(coverage[0]),
+        _ordinal(coverage[1]),
+        len(parts[0]), len(parts[1]), len(parts[2]),
+        bars.days[0] if n else 0,
+    )
+    body = bytearray(meta)
+    for name in _FLOAT_COLUMNS:
+        body += memoryview(getattr(bars, name)).cast("B")
+    body += array("I", (bars.days[i] - bars.days[i - 1] for i in range(1, n))).tobytes()
+
+    code = _COMPRESSION_CODES.get(compression, COMPRESSION_ZLIB)
+    if code == COMPRESSION_ZSTD:
+        try:
+            import zstandard
+        except ImportError:
+            code = COMPRESSION_ZLIB
+        else:
+            body = zstandard.ZstdCompressor().compress(bytes(body))
+    if code == COMPRESSION_ZLIB:
+        body = zlib.compress(bytes(body), 6)
+    return _HEADER.pack(_MAGIC, _VERSION, code, 0) + bytes(body)
+
+
+def encode_entry_snapshot(context: dict) -> bytes:
+    """Snapshot blob for trades.entry_snapshot_bin, compressed as configured.
+
+    Every writer of the column (snapshot threads, write-back, backfill) goes
+    through here so they all produce the same format.
+    """
+    from app.config import get_market_data_config
+
+    return encode_snapshot(context, get_market_data_config().get("snapshot_compression", "zlib"))
+
+
+def decode_snapshot(blob: bytes) -> dict:
+    """Decode a snapshot blob into a market_context whose windows are KLineSeries views."""
+    if len(blob) < _HEADER.size:
+        raise ValueError("truncated snapshot header")
+    magic, version, code, _ = _HEADER.unpack_from(blob)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"not a market snapshot (magic={magic!r}, version={version})")
+    body = memoryview(blob)[_HEADER.size:]
+    if code == COMPRESSION_ZLIB:
+        body = memoryview(zlib.decompress(body))
+    elif code == COMPRESSION_ZSTD:
+        import zstandard
+
+        body = memoryview(zstandard.ZstdDecompressor().decompress(bytes(body)))
+    elif code != COMPRESSION_NONE:
+        raise ValueError(f"unknown snapshot compression {code}")
+
+    benchmark_return, available, cov_from, cov_through, n_before, n_during, n_after, first_day = _META.unpack_from(body)
+    n = n_before + n_during + n_after
+    if len(body) != _META.size + n * 8 * len(_FLOAT_COLUMNS) + max(n - 1, 0) * 4:
+        raise ValueError(f"snapshot body does not match {n} bars")
+    offset = _META.size
+    columns = []
+    for _ in _FLOAT_COLUMNS:
+        columns.append(body[offset:offset + n * 8].cast("d"))
+        offset += n * 8
+    days = array("q", accumulate(body[offset:].cast("I"), initial=first_day)) if n else array("q")
+    bars = KLineSeries(days, *columns)
+
+    return {
+        "klines_before": bars.view(0, n_before),
+        "klines_during": bars.view(n_before, n_before + n_during),
+        "klines_after_exit": bars.view(n_before + n_during, n),
+        "benchmark_return": None if math.isnan(benchmark_return) else benchmark_return,
+        "data_available": bool(available),
+        "coverage": [date.fromordinal(cov_from).isoformat(), date.fromordinal(cov_through).isoformat()]
+        if cov_from and cov_through else None,
+    }
+
+
+def read_stored_snapshot(blob: bytes | None, text: str | None = None, columnar: bool = False) -> dict | None:
+    """Stored snapshot of a trade from its binary or legacy JSON column.
+
+    columnar=True keeps K-line windows as KLineSeries (for enrichment);
+    otherwise they are JSON-safe lists of bar dicts.
+    """
+    if blob:
+        context = decode_snapshot(bytes(blob))
+        return context if columnar else context_to_dict(context)
+    if text:
+        return json.loads(text)
+    return None
+
+
+def _as_series(value: Any) -> KLineSeries:
+    if isinstance(value, KLineSeries):
+        return value
+    return KLineSeries.from_dicts(value or [])
+
+
+def _ordinal(date_str: str) -> int:
+    return date.fromisoformat(date_str).toordinal() if date_str else 0
@@ -2,26 +2,91 @@
 
 Takes raw trade dicts from the DB and enriches them with:
 - K-line data during the holding period
-- Historical K-lines before entry (for context)
-- K-lines after exit (for hindsight analysis)
+- Historical K-lines before entry (for context), CONTEXT_BARS_BEFORE trading days
+- K-lines after exit (for hindsight analysis), CONTEXT_BARS_AFTER trading days
 - Benchmark return during the period
+
+K-line windows are KLineSeries views onto one fetched span per symbol; use
+context_to_dict() to serialize a market_context for JSON storage.
+
+Enrichment is incremental: a trade that carries a stored entry_snapshot (a
+serialized market_context with its "coverage" date range) reuses those bars
+and only fetches the parts of its window the snapshot does not cover yet,
+typically the rest of the holding period and the post-exit bars. Stored
+bars are re-based onto today's price adjustment when merged (see
+_merge_stored). The merged context gets the widened coverage so callers can
+write it back.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from typing import Any
+from zoneinfo import ZoneInfo
 
-from .market_data import KLine, MarketDataProvider, get_provider
+from .index_store import get_index_store, interval_returns
+from .market_data import AsyncMarketDataProvider, MarketDataProvider, get_provider, peek_klines
+from .series import KLineSeries
+from .trading_calendar import get_trading_calendar
 
 logger = logging.getLogger(__name__)
 
-CONTEXT_DAYS_BEFORE = 30
-CONTEXT_DAYS_AFTER = 5
+CN_TZ = ZoneInfo("Asia/Shanghai")
+CONTEXT_BARS_BEFORE = 30
+CONTEXT_BARS_AFTER = 5
 DEFAULT_BENCHMARK = "sh000001"
 
 
+@dataclass(frozen=True)
+class _TradeWindow:
+    """Date span of market data needed to enrich one trade.
+
+    stored/covered_from/covered_through describe bars reused from the trade's
+    entry_snapshot; only the rest of [start_date, end_date] is fetched.
+    """
+    symbol: str
+    entry_date: str
+    exit_date: str
+    start_date: str
+    end_date: str
+    stored: KLineSeries | None = None
+    covered_from: str = ""
+    covered_through: str = ""
+
+    def stored_bars(self) -> KLineSeries:
+        """The stored bars reused for this window."""
+        if self.stored is None:
+            return KLineSeries.empty()
+        return self.stored.between(max(self.start_date, self.covered_from), min(self.end_date, self.covered_through))
+
+    def fetch_ranges(self) -> list[tuple[str, str]]:
+        """Parts of the window not covered by the stored snapshot.
+
+        Each range overlaps the stored bars by their edge bar, so the merge
+        can re-base the stored prices onto the fetched ones (see _merge_stored).
+        """
+        if self.stored is None:
+            return [(self.start_date, self.end_date)]
+        kept = self.stored_bars()
+        ranges = []
+        if self.start_date < self.covered_from:
+            head_end = date.fromordinal(kept.days[0]).isoformat() if kept else _shift_day(self.covered_from, -1)
+            ranges.append((self.start_date, head_end))
+        if self.covered_through < self.end_date:
+            tail_start = (
+                date.fromordinal(kept.days[-1]).isoformat() if kept
+                else max(self.start_date, _shift_day(self.covered_through, 1))
+            )
+            ranges.append((tail_start, self.end_date))
+        return ranges
+
+
 def enrich_trade(
     trade: dict,
     provider: MarketDataProvider | None = None,
@@ -32,92 +97,363 @@ def enrich_trade(
     If market data is unavailable, returns the trade unchanged with an empty context.
     """
     provider = provider or get_provider()
-    symbol = trade.get("symbol", "")
-    entry_time = trade.get("entry_time", "")
-    exit_time = trade.get("exit_time", "")
-
-    if not symbol or not entry_time:
+    window = _trade_window(trade)
+    if window is None:
         trade["market_context"] = _empty_context()
         return trade
 
-    entry_date = _to_date_str(entry_time)
-    exit_date = _to_date_str(exit_time) if exit_time else entry_date
+    items = [(trade, window)]
+    klines = _fetch_group(items, provider)
+    benchmark = get_index_store().get_klines(DEFAULT_BENCHMARK, window.entry_date, window.exit_date, provider)
+    _apply_group(items, klines, benchmark)
+    return trade
 
-    before_date = _offset_date(entry_date, -CONTEXT_DAYS_BEFORE)
-    after_date = _offset_date(exit_date, CONTEXT_DAYS_AFTER) if exit_time else entry_date
 
-    klines_before = provider.get_klines(symbol, before_date, _offset_date(entry_date, -1))
-    klines_during = provider.get_klines(symbol, entry_date, exit_date)
-    klines_after = []
-    if exit_time:
-        klines_after = provider.get_klines(symbol, _offset_date(exit_date, 1), after_date)
+def enrich_trades(
+    trades: list[dict],
+    provider: MarketDataProvider | None = None,
+    max_workers: int = 1,
+) -> list[dict]:
+    """Enrich a list of trades with market context data.
 
-    benchmark_klines = provider.get_index_klines(DEFAULT_BENCHMARK, entry_date, exit_date)
-    benchmark_return = _compute_return(benchmark_klines)
+    Trades are grouped by symbol and each symbol's K-lines are fetched once over
+    the union of its trades' windows, then sliced per trade. With max_workers > 1
+    the symbol groups are fetched concurrently on a bounded thread pool.
+    """
+    provider = provider or get_provider()
+    groups = list(_plan_batch(trades).values())
+    if not groups:
+        return trades
+    start_date, end_date = _benchmark_span(groups)
+    benchmark = get_index_store().get_klines(DEFAULT_BENCHMARK, start_date, end_date, provider)
 
-    trade["market_context"] = {
-        "klines_before": [_kline_to_dict(k) for k in klines_before],
-        "klines_during": [_kline_to_dict(k) for k in klines_during],
-        "klines_after_exit": [_kline_to_dict(k) for k in klines_after],
-        "benchmark_return": benchmark_return,
-        "data_available": bool(klines_during),
-    }
+    def enrich_group(items: list[tuple[dict, _TradeWindow]]) -> None:
+        _apply_group(items, _fetch_group(items, provider), benchmark)
 
-    return trade
+    if max_workers > 1 and len(groups) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as pool:
+            list(pool.map(enrich_group, groups))
+    else:
+        for items in groups:
+            enrich_group(items)
+    return trades
 
 
-def enrich_trades(
+async def enrich_trades_async(
     trades: list[dict],
-    provider: MarketDataProvider | None = None,
+    provider: AsyncMarketDataProvider,
+    max_concurrency: int = 8,
+    deadline: float | None = None,
 ) -> list[dict]:
-    """Enrich a list of trades with market context data."""
-    provider = provider or get_provider()
-    return [enrich_trade(t, provider) for t in trades]
+    """Async counterpart of enrich_trades.
 
+    Symbol groups are fetched with asyncio.gather, at most max_concurrency
+    requests in flight at once.
 
-def _to_date_str(time_str: str) -> str:
-    """Extract YYYY-MM-DD from an ISO datetime string."""
-    if not time_str:
-        return ""
-    return time_str[:10]
+    With a deadline (seconds), enrichment returns once the budget is spent:
+    groups whose fetch has not finished are built from locally cached bars
+    only (stale-while-revalidate; windows with no cached bars get
+    data_available False) and marked "stale", while their fetches keep running
+    in the background to warm the cache for the next request. The deadline
+    counts from the call, planning included.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    # Planning may load the trading calendar (a blocking download on a cold
+    # process), so it runs off the event loop.
+    groups = list((await loop.run_in_executor(None, _plan_batch, trades)).values())
+    if not groups:
+        return trades
+    start_date, end_date = _benchmark_span(groups)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def fetch_benchmark() -> KLineSeries:
+        async with semaphore:
+            return await get_index_store().get_klines_async(DEFAULT_BENCHMARK, start_date, end_date, provider)
 
+    async def fetch_group(items: list[tuple[dict, _TradeWindow]]) -> KLineSeries:
+        span = _group_span(items)
+        if span is None:
+            return KLineSeries.empty()
+        symbol, start, end = span
+        async with semaphore:
+            try:
+                return await provider.get_klines(symbol, start, end)
+            except Exception as e:
+                logger.warning("K-line fetch failed for %s: %s", symbol, e)
+                return KLineSeries.empty()
 
-def _offset_date(date_str: str, days: int) -> str:
-    """Offset a date string by N days."""
+    if deadline is None:
+        benchmark, *series = await asyncio.gather(fetch_benchmark(), *(fetch_group(items) for items in groups))
+        for items, klines in zip(groups, series):
+            _apply_group(items, klines, benchmark)
+        return trades
+
+    benchmark_task = asyncio.ensure_future(fetch_benchmark())
+    group_tasks = [asyncio.ensure_future(fetch_group(items)) for items in groups]
+    _, pending = await asyncio.wait([benchmark_task, *group_tasks], timeout=max(0.0, deadline - (loop.time() - started)))
+    if pending:
+        logger.info("enrichment deadline %.1fs hit, %d fetches continue in background", deadline, len(pending))
+        _keep_running(pending)
+
+    if benchmark_task in pending:
+        benchmark = get_index_store().peek(DEFAULT_BENCHMARK, start_date, end_date)
+    else:
+        benchmark = benchmark_task.result()
+    for items, task in zip(groups, group_tasks):
+        if task in pending:
+            span = _group_span(items)
+            cached = peek_klines(provider, *span) if span else KLineSeries.empty()
+            _apply_group(items, cached, benchmark, stale=True)
+        else:
+            _apply_group(items, task.result(), benchmark)
+    return trades
+
+
+# Fetches that outlived their request's deadline; referenced until done so
+# they are not garbage-collected mid-flight.
+_background_fetches: set[asyncio.Future] = set()
+
+
+def _keep_running(tasks: set[asyncio.Future]) -> None:
+    for task in tasks:
+        _background_fetches.add(task)
+        task.add_done_callback(_background_fetches.discard)
+
+
+def _fetch_group(items: list[tuple[dict, _TradeWindow]], provider: MarketDataProvider) -> KLineSeries:
+    """Fetch one symbol's K-lines over the union of its trades' uncovered ranges."""
+    span = _group_span(items)
+    if span is None:
+        return KLineSeries.empty()
+    symbol, start_date, end_date = span
     try:
-        d = date.fromisoformat(date_str)
-        return (d + timedelta(days=days)).isoformat()
-    except (ValueError, TypeError):
-        return date_str
+        return provider.get_klines(symbol, start_date, end_date)
+    except Exception as e:
+        logger.warning("K-line fetch failed for %s: %s", symbol, e)
+        return KLineSeries.empty()
+
+
+def _apply_group(
+    items: list[tuple[dict, _TradeWindow]],
+    series: KLineSeries,
+    benchmark: KLineSeries,
+    stale: bool = False,
+) -> None:
+    """Slice every trade's context out of its symbol's shared series (merged with stored bars).
+
+    stale=True means `series` holds only locally cached bars: the context is
+    flagged "stale" and gets no coverage, so it is never written back.
+    """
+    for trade, window in items:
+        try:
+            klines = series.between(window.start_date, window.end_date)
+            write_back = not stale
+            if window.stored is not None:
+                merged = _merge_stored(klines, window)
+                if merged is None:
+                    # The stored bars could not be re-based: use the fetched bars
+                    # alone and leave the stored snapshot as it is.
+                    write_back = False
+                else:
+                    klines = merged
+            trade["market_context"] = _build_context(klines, window, benchmark)
+            if stale:
+                trade["market_context"]["stale"] = True
+            trade["market_context"]["coverage"] = _coverage(klines, window, series) if write_back else None
+        except Exception as e:
+            logger.warning("enrichment failed for trade %s: %s", trade.get("id"), e)
+            trade["market_context"] = _empty_context()
 
 
-def _compute_return(klines: list[KLine]) -> float | None:
-    """Compute simple return from first to last K-line close."""
-    if len(klines) < 2:
+def _group_span(items: list[tuple[dict, _TradeWindow]]) -> tuple[str, str, str] | None:
+    """Symbol and date span to fetch for a group, or None if snapshots cover everything."""
+    ranges = [r for _, w in items for r in w.fetch_ranges()]
+    if not ranges:
         return None
-    first_close = klines[0].close
-    last_close = klines[-1].close
-    if first_close <= 0:
+    return items[0][1].symbol, min(s for s, _ in ranges), max(e for _, e in ranges)
+
+
+def _merge_stored(fetched: KLineSeries, window: _TradeWindow) -> KLineSeries | None:
+    """Stored snapshot bars, with fetched bars filling the head and tail around them.
+
+    Stored bars are forward-adjusted (qfq) as of the day they were captured,
+    fetched bars as of today; a dividend or split in between scales every
+    earlier qfq price by the same factor. That factor is read off a bar both
+    sides hold (fetch_ranges overlaps the stored edge bars), and the stored
+    prices are re-based by it. None when fetched bars must be joined on but
+    no shared bar came back to re-base by.
+    """
+    head = fetched.between(window.start_date, _shift_day(window.covered_from, -1))
+    stored = window.stored_bars()
+    tail = fetched.between(_shift_day(window.covered_through, 1), window.end_date)
+    if not stored:
+        return head + tail
+    ratio = _seam_ratio(fetched, stored)
+    if ratio is None:
+        return stored if not head and not tail else None
+    if ratio != 1.0:
+        stored = KLineSeries(
+            stored.days,
+            *(array("d", (v * ratio for v in getattr(stored, name))) for name in ("opens", "highs", "lows", "closes")),
+            stored.volumes,
+            stored.turnovers,
+        )
+    return head + stored + tail
+
+
+def _seam_ratio(fetched: KLineSeries, stored: KLineSeries) -> float | None:
+    """fetched / stored close on a bar both series hold (the stored edge bars), if any."""
+    for i in (-1, 0):
+        day = stored.days[i]
+        j = bisect_left(fetched.days, day)
+        if j < len(fetched) and fetched.days[j] == day and stored.closes[i] > 0:
+            return fetched.closes[j] / stored.closes[i]
+    return None
+
+
+def _coverage(klines: KLineSeries, window: _TradeWindow, fetched: KLineSeries) -> list[str] | None:
+    """Date range the context's bars are complete for, as stored with the snapshot.
+
+    Coverage never extends past yesterday (today's bar is still forming). A
+    stored snapshot's range only widens where the fetch actually returned
+    bars, and the range never reaches past the first and last bar actually
+    saved (a partial fetch may stop short of either edge, and stored bars
+    outside the window are not kept). An edge left out is tried again next
+    time.
+    """
+    if not klines:
+        return None
+    yesterday = _shift_day(datetime.now(CN_TZ).date().isoformat(), -1)
+    start, end = window.start_date, min(window.end_date, yesterday)
+    if window.stored is not None:
+        if window.covered_from <= start or not fetched.between(start, _shift_day(window.covered_from, -1)):
+            start = window.covered_from
+        if window.covered_through >= end or not fetched.between(_shift_day(window.covered_through, 1), end):
+            end = window.covered_through
+    start = max(start, date.fromordinal(klines.days[0]).isoformat())
+    end = min(end, date.fromordinal(klines.days[-1]).isoformat())
+    return [start, end] if start <= end else None
+
+
+def _benchmark_span(groups: list[list[tuple[dict, _TradeWindow]]]) -> tuple[str, str]:
+    windows = [w for items in groups for _, w in items]
+    return min(w.entry_date for w in windows), max(w.exit_date for w in windows)
+
+
+def _trade_window(trade: dict) -> _TradeWindow | None:
+    symbol = (trade.get("symbol") or "").strip().upper()
+    entry_time = trade.get("entry_time", "")
+    exit_time = trade.get("exit_time", "")
+    if not symbol or not entry_time:
         return None
-    return round((last_close - first_close) / first_close, 6)
 
+    entry_date = _to_date_str(entry_time)
+    exit_date = _to_date_str(exit_time) if exit_time else entry_date
+    try:
+        date.fromisoformat(entry_date)
+        date.fromisoformat(exit_date)
+    except ValueError:
+        return None
+    calendar = get_trading_calendar()
+    start_date = calendar.shift(entry_date, -CONTEXT_BARS_BEFORE)
+    end_date = calendar.shift(exit_date, CONTEXT_BARS_AFTER) if exit_time else entry_date
+    stored = _stored_snapshot(trade.get("entry_snapshot"))
+    # A snapshot that does not touch the window (e.g. the entry date was edited) is ignored.
+    if stored and (stored["covered_from"] > end_date or stored["covered_through"] < _shift_day(start_date, -1)):
+        stored = {}
+    return _TradeWindow(
+        symbol=symbol,
+        entry_date=entry_date,
+        exit_date=exit_date,
+        start_date=start_date,
+        end_date=end_date,
+        **stored,
+    )
+
+
+def _stored_snapshot(snapshot: Any) -> dict:
+    """_TradeWindow fields for the bars of a stored entry_snapshot (empty if unusable).
 
-def _kline_to_dict(k: KLine) -> dict:
+    Windows may be bar-dict lists (JSON snapshots) or KLineSeries (decoded
+    binary snapshots, see data_service.codec).
+
+    Snapshots written before coverage was recorded fall back to the dates of
+    their bars, minus the last one: it may have been captured intraday.
+    """
+    if not isinstance(snapshot, dict):
+        return {}
+    try:
+        parts = [snapshot.get(key) for key in ("klines_before", "klines_during", "klines_after_exit")]
+        stored = KLineSeries.empty()
+        for part in parts:
+            stored = stored + (part if isinstance(part, KLineSeries) else KLineSeries.from_dicts(part or []))
+    except (KeyError, TypeError, ValueError):
+        return {}
+    coverage = snapshot.get("coverage")
+    if isinstance(coverage, list) and len(coverage) == 2:
+        covered_from, covered_through = coverage
+    elif stored:
+        dates = stored.dates
+        covered_from, covered_through = dates[0], _shift_day(dates[-1], -1)
+    else:
+        return {}
+    return {"stored": stored, "covered_from": covered_from, "covered_through": covered_through}
+
+
+def _plan_batch(trades: list[dict]) -> dict[str, list[tuple[dict, _TradeWindow]]]:
+    """Group trades by symbol; trades without enough data get an empty context."""
+    plan: dict[str, list[tuple[dict, _TradeWindow]]] = {}
+    for trade in trades:
+        window = _trade_window(trade)
+        if window is None:
+            trade["market_context"] = _empty_context()
+            continue
+        plan.setdefault(window.symbol, []).append((trade, window))
+    return plan
+
+
+def _build_context(
+    klines: KLineSeries,
+    window: _TradeWindow,
+    benchmark: KLineSeries,
+) -> dict:
+    klines_before, klines_during, klines_after = klines.split(window.entry_date, window.exit_date)
+    benchmark_return = interval_returns(benchmark, [(window.entry_date, window.exit_date)])[0]
+
+    return {
+        "klines_before": klines_before,
+        "klines_during": klines_during,
+        "klines_after_exit": klines_after,
+        "benchmark_return": benchmark_return,
+        "data_available": bool(klines_during),
+    }
+
+
+def context_to_dict(context: dict) -> dict:
+    """JSON-safe copy of a market_context: K-line series become lists of bar dicts."""
     return {
-        "date": k.date,
-        "open": k.open,
-        "high": k.high,
-        "low": k.low,
-        "close": k.close,
-        "volume": k.volume,
+        key: value.to_dicts() if isinstance(value, KLineSeries) else value
+        for key, value in context.items()
     }
 
 
+def _shift_day(date_str: str, days: int) -> str:
+    return (date.fromisoformat(date_str) + timedelta(days=days)).isoformat()
+
+
+def _to_date_str(time_str: str) -> str:
+    """Extract YYYY-MM-DD from an ISO datetime string."""
+    if not time_str:
+        return ""
+    return time_str[:10]
+
+
 def _empty_context() -> dict:
     return {
-        "klines_before": [],
-        "klines_during": [],
-        "klines_after_exit": [],
+        "klines_before": KLineSeries.empty(),
+        "klines_during": KLineSeries.empty(),
+        "klines_after_exit": KLineSeries.empty(),
         "benchmark_return": None,
         "data_available": False,
     }
@@ -0,0 +1,282 @@
+"""Process-wide store of benchmark index series.
+
+Index data sources (e.g. AKShare's stock_zh_index_daily) return the full
+history on every call, so fetching per trade is wasteful. The store loads each
+index once, keeps it as a date-sorted series, tops it up at most once per day and
+answers range queries by binary search.
+
+Benchmark returns need no slicing at all: the close column is the index's
+cumulative level, so the return over [start, end] is two bisects and two array
+reads. benchmark_returns() answers a whole batch of intervals in one call.
+
+With a SharedSeriesStore attached the series is shared by every process on the
+node: a process adopts the published copy (memory-mapped, zero-copy) when it is
+newer than its own, and only the process holding the index's refresh lock
+downloads and publishes the daily top-up (see data_service.shared_cache).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Iterable
+from zoneinfo import ZoneInfo
+
+from .market_data import AsyncMarketDataProvider, MarketDataProvider
+from .series import KLineSeries
+from .shared_cache import SharedSeriesStore
+
+logger = logging.getLogger(__name__)
+
+CN_TZ = ZoneInfo("Asia/Shanghai")
+HISTORY_START = "1990-01-01"
+RETRY_AFTER_FAILURE_SECONDS = 300
+
+
+class IndexSeries:
+    """Date-sorted bars of one index plus the day it was last refreshed."""
+
+    __slots__ = ("series", "refreshed_on")
+
+    def __init__(self) -> None:
+        self.series = KLineSeries.empty()
+        self.refreshed_on = ""
+
+    def extend(self, klines: KLineSeries) -> None:
+        """Append klines, replacing stored bars from klines' first day on (e.g. a partial intraday bar)."""
+        if self.series and klines:
+            keep = bisect_left(self.series.days, klines.days[0])
+            self.series = self.series.view(0, keep) + klines
+        else:
+            self.series = self.series + klines
+
+    def slice(self, start_date: str, end_date: str) -> KLineSeries:
+        return self.series.between(start_date, end_date)
+
+
+class IndexSeriesStore:
+    """Loads each index once per process and refreshes it incrementally once per day."""
+
+    def __init__(self, shared: SharedSeriesStore | None = None) -> None:
+        self.shared = shared
+        self._series: dict[str, IndexSeries] = {}
+        self._failed_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        # index_code -> the async refresh in flight, shared by concurrent callers
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def get_klines(
+        self,
+        index_code: str,
+        start_date: str,
+        end_date: str,
+        provider: MarketDataProvider,
+    ) -> KLineSeries:
+        # Fetches are serialized so concurrent callers wait for one download
+        # instead of each starting their own; _lock only guards the state.
+        # With a shared store the same holds across processes.
+        with self._fetch_lock:
+            if self._needs_refresh(index_code):
+                if self.shared is None:
+                    self._refresh(index_code, provider)
+                else:
+                    with self.shared.refreshing(_shared_key(index_code)):
+                        # Another process may have published while we waited.
+                        if self._needs_refresh(index_code):
+                            self._refresh(index_code, provider)
+                            self._publish(index_code)
+        with self._lock:
+            return self._slice(index_code, start_date, end_date)
+
+    async def get_klines_async(
+        self,
+        index_code: str,
+        start_date: str,
+        end_date: str,
+        provider: AsyncMarketDataProvider,
+    ) -> KLineSeries:
+        if self._needs_refresh(index_code):
+            # Single-flight within the process: concurrent callers await one download.
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                task = self._inflight.get(index_code)
+                if task is None or task.done() or task.get_loop() is not loop:
+                    task = self._inflight[index_code] = loop.create_task(self._refresh_async(index_code, provider))
+            # A cancelled caller must not cancel the download the others wait on.
+            await asyncio.shield(task)
+        with self._lock:
+            return self._slice(index_code, start_date, end_date)
+
+    async def _refresh_async(self, index_code: str, provider: AsyncMarketDataProvider) -> None:
+        try:
+            with self._lock:
+                fetch_from = self._refresh_from(index_code)
+            if fetch_from is None:
+                return
+            try:
+                klines = await provider.get_index_klines(index_code, fetch_from, _today())
+            except Exception as e:
+                logger.warning("index %s refresh failed: %s", index_code, e)
+                klines = KLineSeries.empty()
+            with self._lock:
+                self._apply(index_code, klines)
+            # Not single-flight across processes (waiting on the file lock would
+            # block the event loop), but the result is still published.
+            self._publish(index_code)
+        finally:
+            with self._lock:
+                if self._inflight.get(index_code) is asyncio.current_task():
+                    del self._inflight[index_code]
+
+    def _needs_refresh(self, index_code: str) -> bool:
+        """Whether index_code needs a download, after adopting a fresher shared copy."""
+        with self._lock:
+            series = self._series.get(index_code)
+            stale = series is None or series.refreshed_on != _today()
+        if stale:
+            self._adopt_shared(index_code)
+        with self._lock:
+            return self._refresh_from(index_code) is not None
+
+    def _refresh(self, index_code: str, provider: MarketDataProvider) -> None:
+        with self._lock:
+            fetch_from = self._refresh_from(index_code)
+        if fetch_from is None:
+            return
+        try:
+            klines = provider.get_index_klines(index_code, fetch_from, _today())
+        except Exception as e:
+            logger.warning("index %s refresh failed: %s", index_code, e)
+            klines = KLineSeries.empty()
+        with self._lock:
+            self._apply(index_code, klines)
+
+    def _adopt_shared(self, index_code: str) -> None:
+        """Use the shared copy of the series if it is newer than ours."""
+        if self.shared is None:
+            return
+        published = self.shared.get(_shared_key(index_code))
+        if published is None:
+            return
+        with self._lock:
+            series = self._series.get(index_code)
+            if series is not None and series.refreshed_on >= published.refreshed_on:
+                return
+            series = self._series[index_code] = IndexSeries()
+            series.series = published.series
+            series.refreshed_on = published.refreshed_on
+            self._failed_at.pop(index_code, None)
+
+    def _publish(self, index_code: str) -> None:
+        if self.shared is None:
+            return
+        with self._lock:
+            series = self._series.get(index_code)
+            if series is None or not series.series:
+                return
+            bars, refreshed_on = series.series, series.refreshed_on
+        try:
+            self.shared.publish(_shared_key(index_code), bars, refreshed_on)
+        except OSError as e:
+            logger.warning("could not publish index %s to the shared cache: %s", index_code, e)
+
+    def _refresh_from(self, index_code: str) -> str | None:
+        """Start date to fetch from, or None when the series is fresh (or backing off)."""
+        series = self._series.get(index_code)
+        if series is not None and series.refreshed_on == _today():
+            return None
+        failed_at = self._failed_at.get(index_code)
+        if failed_at is not None and time.monotonic() - failed_at < RETRY_AFTER_FAILURE_SECONDS:
+            return None
+        if series is not None and series.series:
+            # Refetch the last stored day too: it may be a partial bar from a refresh during trading hours.
+            return date.fromordinal(series.series.days[-1]).isoformat()
+        return HISTORY_START
+
+    def _apply(self, index_code: str, klines: KLineSeries) -> None:
+        # A successful fetch returns at least the last stored day, so empty means failed.
+        if not klines:
+            logger.warning("index %s unavailable, retrying in %ss", index_code, RETRY_AFTER_FAILURE_SECONDS)
+            self._failed_at[index_code] = time.monotonic()
+            return
+        series = self._series.get(index_code)
+        if series is None:
+            series = self._series[index_code] = IndexSeries()
+        series.extend(klines)
+        series.refreshed_on = _today()
+        self._failed_at.pop(index_code, None)
+
+    def _slice(self, index_code: str, start_date: str, end_date: str) -> KLineSeries:
+        series = self._series.get(index_code)
+        return series.slice(start_date, end_date) if series else KLineSeries.empty()
+
+    def peek(self, index_code: str, start_date: str, end_date: str) -> KLineSeries:
+        """Slice of the loaded series without refreshing it (may be stale or empty)."""
+        self._adopt_shared(index_code)
+        with self._lock:
+            return self._slice(index_code, start_date, end_date)
+
+    def benchmark_returns(
+        self,
+        index_code: str,
+        intervals: Iterable[tuple[str, str]],
+        provider: MarketDataProvider | None = None,
+    ) -> list[float | None]:
+        """Index return over each (start_date, end_date) interval.
+
+        With a provider the series is loaded / refreshed first (like
+        get_klines); without one only what is already loaded is used, so the
+        call never waits on the network.
+        """
+        if provider is not None:
+            self.get_klines(index_code, _today(), _today(), provider)
+        else:
+            self._adopt_shared(index_code)
+        with self._lock:
+            series = self._series.get(index_code)
+            bars = series.series if series else KLineSeries.empty()
+        return interval_returns(bars, intervals)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self._failed_at.clear()
+
+
+def interval_returns(series: KLineSeries, intervals: Iterable[tuple[str, str]]) -> list[float | None]:
+    """Close-to-close return of `series` over each [start_date, end_date] (ISO dates).
+
+    None when an interval holds fewer than two bars or starts at a non-positive
+    close; returns are rounded to 6 decimals.
+    """
+    days, closes = series.days, series.closes
+    out: list[float | None] = []
+    for start_date, end_date in intervals:
+        i = bisect_left(days, date.fromisoformat(start_date).toordinal())
+        j = bisect_right(days, date.fromisoformat(end_date).toordinal()) - 1
+        if j - i < 1 or closes[i] <= 0:
+            out.append(None)
+        else:
+            out.append(round((closes[j] - closes[i]) / closes[i], 6))
+    return out
+
+
+_store = IndexSeriesStore()
+
+
+def get_index_store() -> IndexSeriesStore:
+    """The process-wide IndexSeriesStore."""
+    return _store
+
+
+def _shared_key(index_code: str) -> str:
+    return f"index/{index_code}"
+
+
+def _today() -> str:
+    return datetime.now(CN_TZ).date().isoformat()
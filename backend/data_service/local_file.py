@@ -0,0 +1,210 @@
+"""Local file market data provider - replays K-lines from a directory on disk.
+
+Deterministic, offline data source for benchmarks, load tests and development.
+Layout (one file per symbol, first match wins):
+
+    <root>/klines/<SYMBOL>.bin | .parquet | .csv
+    <root>/index/<INDEX_CODE>.bin | .parquet | .csv
+
+`.bin` files are this module's columnar format and are memory-mapped, so the
+returned KLineSeries columns are zero-copy views onto the page cache:
+
+    header  "<4sIQ"  magic b"VKLB", version, bar count
+    days    int64[n] date ordinals
+    open, high, low, close, volume, turnover   float64[n] each
+
+CSV files need a header row with date,open,high,low,close,volume[,turnover];
+Parquet needs the same column names and pyarrow installed.
+
+Snapshot real data into this layout with:
+
+    python -m data_service.snapshot --out data/market --start 2020-01-01 \\
+        --end 2024-12-31 --index sh000001 000001 600519
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+from .adjust import AdjustingProvider
+from .market_data import MarketDataProvider, get_provider
+from .series import KLineSeries
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"VKLB"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIQ")
+_COLUMNS = ("days", "opens", "highs", "lows", "closes", "volumes", "turnovers")
+_EXTENSIONS = (".bin", ".parquet", ".csv")
+
+
+class LocalFileProvider:
+    """MarketDataProvider backed by per-symbol files under a root directory."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self._loaded: dict[Path, tuple[float, KLineSeries]] = {}
+        self._lock = threading.Lock()
+
+    def get_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        if period != "daily":
+            return KLineSeries.empty()
+        return self._series("klines", symbol.strip().upper()).between(start_date, end_date)
+
+    def peek_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        # Everything is local already.
+        return self.get_klines(symbol, start_date, end_date, period)
+
+    def get_index_klines(
+        self,
+        index_code: str,
+        start_date: str,
+        end_date: str,
+    ) -> KLineSeries:
+        return self._series("index", index_code.strip()).between(start_date, end_date)
+
+    def _series(self, kind: str, code: str) -> KLineSeries:
+        path = _find_file(self.root / kind, code)
+        if path is None:
+            return KLineSeries.empty()
+        mtime = path.stat().st_mtime
+        with self._lock:
+            cached = self._loaded.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        try:
+            series = _read_file(path)
+        except Exception as e:
+            logger.error("failed to read market data file %s: %s", path, e)
+            return KLineSeries.empty()
+        with self._lock:
+            self._loaded[path] = (mtime, series)
+        return series
+
+
+def write_series(path: str | Path, series: KLineSeries) -> None:
+    """Write a series in the memory-mappable .bin format (atomic replace)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(series)))
+        for name in _COLUMNS:
+            f.write(memoryview(getattr(series, name)).tobytes())
+    os.replace(tmp, path)
+
+
+def read_series(path: str | Path) -> KLineSeries:
+    """Memory-map a .bin file; the returned columns are views onto the mapping."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < _HEADER.size:
+            raise ValueError(f"{path}: truncated header")
+        buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    magic, version, count = _HEADER.unpack_from(buf)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"{path}: not a K-line file (magic={magic!r}, version={version})")
+    if size != _HEADER.size + count * 8 * len(_COLUMNS):
+        raise ValueError(f"{path}: expected {count} bars, size {size} does not match")
+    columns = []
+    offset = _HEADER.size
+    for name in _COLUMNS:
+        columns.append(buf[offset:offset + count * 8].cast("q" if name == "days" else "d"))
+        offset += count * 8
+    return KLineSeries(*columns)
+
+
+def snapshot(
+    out_dir: str | Path,
+    symbols: list[str],
+    start_date: str,
+    end_date: str,
+    index_codes: list[str] | None = None,
+    provider: MarketDataProvider | None = None,
+) -> dict[str, int]:
+    """Fetch K-lines from a live provider and save them under out_dir. Returns bar counts.
+
+    Files hold qfq-adjusted bars as of the snapshot date.
+    """
+    provider = provider or AdjustingProvider(get_provider())
+    root = Path(out_dir)
+    counts: dict[str, int] = {}
+    for symbol in symbols:
+        code = symbol.strip().upper()
+        series = provider.get_klines(code, start_date, end_date)
+        write_series(root / "klines" / f"{code}.bin", series)
+        counts[code] = len(series)
+    for index_code in index_codes or []:
+        series = provider.get_index_klines(index_code, start_date, end_date)
+        write_series(root / "index" / f"{index_code}.bin", series)
+        counts[index_code] = len(series)
+    return counts
+
+
+def _find_file(directory: Path, code: str) -> Path | None:
+    for ext in _EXTENSIONS:
+        path = directory / f"{code}{ext}"
+        if path.is_file():
+            return path
+    return None
+
+
+def _read_file(path: Path) -> KLineSeries:
+    if path.suffix == ".bin":
+        return read_series(path)
+    if path.suffix == ".parquet":
+        return _read_parquet(path)
+    return _read_csv(path)
+
+
+def _read_csv(path: Path) -> KLineSeries:
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    rows.sort(key=lambda r: r["date"])
+    return KLineSeries.from_columns(
+        [r["date"] for r in rows],
+        [float(r["open"]) for r in rows],
+        [float(r["high"]) for r in rows],
+        [float(r["low"]) for r in rows],
+        [float(r["close"]) for r in rows],
+        [float(r.get("volume") or 0) for r in rows],
+        [float(r.get("turnover") or 0) for r in rows],
+    )
+
+
+def _read_parquet(path: Path) -> KLineSeries:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        logger.warning("pyarrow not installed, cannot read %s", path)
+        return KLineSeries.empty()
+    table = pq.read_table(path).sort_by("date").to_pydict()
+    n = len(table["date"])
+    return KLineSeries.from_columns(
+        table["date"],
+        table["open"],
+        table["high"],
+        table["low"],
+        table["close"],
+        table.get("volume") or [0.0] * n,
+        table.get("turnover"),
+    )
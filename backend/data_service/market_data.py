@@ -1,29 +1,32 @@
 """Market data provider - fetches K-line (OHLCV) data from external sources.
 
 MVP uses AKShare for A-share data. Designed for easy extension to other sources
-(Yahoo Finance, Tushare, etc.) via the MarketDataProvider protocol.
+(Yahoo Finance, Tushare, etc.) via the MarketDataProvider protocol. AsyncMarketDataProvider is the asyncio
+counterpart; AsyncProviderAdapter wraps any sync provider in an executor.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from dataclasses import dataclass
+from concurrent.futures import Executor
 from datetime import date, datetime, timedelta
-from typing import Any, Protocol
+from typing import TYPE_CHECKING, Any, Protocol
+
+from .series import KLine, KLineSeries  # noqa: F401 - KLine re-exported for callers
+
+if TYPE_CHECKING:
+    from .adjust import AdjustFactors
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class KLine:
-    """Single K-line (candlestick) data point."""
-    date: str
-    open: float
-    high: float
-    low: float
-    close: float
-    volume: float
-    turnover: float = 0.0
+class MarketDataError(Exception):
+    """Upstream market data fetch failed (network error, throttling, bad response).
+
+    Distinct from an empty result: a provider returns an empty series when the
+    source has no bars for the request, and raises this when it could not tell.
+    """
 
 
 class MarketDataProvider(Protocol):
@@ -35,18 +38,107 @@ class MarketDataProvider(Protocol):
         start_date: str,
         end_date: str,
         period: str = "daily",
-    ) -> list[KLine]: ...
+    ) -> KLineSeries: ...
 
     def get_index_klines(
         self,
         index_code: str,
         start_date: str,
         end_date: str,
-    ) -> list[KLine]: ...
+    ) -> KLineSeries: ...
+
+
+class AsyncMarketDataProvider(Protocol):
+    """Async counterpart of MarketDataProvider, for use from the event loop."""
+
+    async def get_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries: ...
+
+    async def get_index_klines(
+        self,
+        index_code: str,
+        start_date: str,
+        end_date: str,
+    ) -> KLineSeries: ...
+
+
+def peek_klines(
+    provider: Any,
+    symbol: str,
+    start_date: str,
+    end_date: str,
+    period: str = "daily",
+) -> KLineSeries:
+    """Bars a provider can serve from local data without any upstream call.
+
+    Providers opt in with a `peek_klines` method (cache layers, local files);
+    for others nothing is available locally and the result is empty.
+    """
+    peek = getattr(provider, "peek_klines", None)
+    if peek is None:
+        return KLineSeries.empty()
+    return peek(symbol, start_date, end_date, period)
+
+
+class AsyncProviderAdapter:
+    """Exposes a sync MarketDataProvider as an AsyncMarketDataProvider.
+
+    Each call runs on an executor thread (the loop's default executor unless
+    one is given), so the event loop is never blocked by provider I/O.
+    """
+
+    def __init__(self, provider: MarketDataProvider, executor: Executor | None = None) -> None:
+        self.provider = provider
+        self.executor = executor
+
+    async def get_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.provider.get_klines, symbol, start_date, end_date, period
+        )
+
+    async def get_index_klines(
+        self,
+        index_code: str,
+        start_date: str,
+        end_date: str,
+    ) -> KLineSeries:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.provider.get_index_klines, index_code, start_date, end_date
+        )
+
+    def peek_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        # Local reads only, called directly so they never queue behind slow fetches.
+        return peek_klines(self.provider, symbol, start_date, end_date, period)
 
 
 class AKShareProvider:
-    """A-share market data via AKShare (free, no API key needed)."""
+    """A-share market data via AKShare (free, no API key needed).
+
+    Fetch failures raise MarketDataError; the registry's tracked provider turns
+    them into empty results and records them in the source's health.
+
+    get_klines returns raw (unadjusted) bars; adjusted prices are derived from
+    get_adjust_factors() by data_service.adjust.AdjustingProvider.
+    """
 
     def get_klines(
         self,
@@ -54,7 +146,7 @@ class AKShareProvider:
         start_date: str,
         end_date: str,
         period: str = "daily",
-    ) -> list[KLine]:
+    ) -> KLineSeries:
         try:
             import akshare as ak
 
@@ -65,66 +157,75 @@ class AKShareProvider:
                     period=period,
                     start_date=start_date.replace("-", ""),
                     end_date=end_date.replace("-", ""),
-                    adjust="qfq",
+                    adjust="",
                 )
-                return [
-                    KLine(
-                        date=str(row["日期"]),
-                        open=float(row["开盘"]),
-                        high=float(row["最高"]),
-                        low=float(row["最低"]),
-                        close=float(row["收盘"]),
-                        volume=float(row["成交量"]),
-                        turnover=float(row.get("成交额", 0)),
-                    )
-                    for _, row in df.iterrows()
-                ]
-            return []
+                return KLineSeries.from_frame(df, "日期", "开盘", "最高", "最低", "收盘", "成交量", "成交额")
+            return KLineSeries.empty()
         except ImportError:
             logger.warning("akshare not installed, market data unavailable")
-            return []
+            return KLineSeries.empty()
         except Exception as e:
-            logger.error("AKShare fetch failed for %s: %s", symbol, e)
-            return []
+            raise MarketDataError(f"AKShare fetch failed for {symbol}: {e}") from e
+
+    def get_adjust_factors(self, symbol: str) -> AdjustFactors | None:
+        """Backward-adjustment (hfq) factor table; empty for symbols without one."""
+        from .adjust import AdjustFactors
+
+        symbol_clean = symbol.strip().upper()
+        if not (len(symbol_clean) == 6 and symbol_clean.isdigit()):
+            return AdjustFactors.empty()
+        try:
+            import akshare as ak
+
+            df = ak.stock_zh_a_daily(symbol=_exchange_prefix(symbol_clean) + symbol_clean, adjust="hfq-factor")
+            return AdjustFactors.from_rows(zip(df["date"].tolist(), df["hfq_factor"].astype(float).tolist()))
+        except ImportError:
+            return None
+        except Exception as e:
+            raise MarketDataError(f"AKShare factor fetch failed for {symbol}: {e}") from e
 
     def get_index_klines(
         self,
         index_code: str,
         start_date: str,
         end_date: str,
-    ) -> list[KLine]:
+    ) -> KLineSeries:
         try:
             import akshare as ak
 
             df = ak.stock_zh_index_daily(symbol=index_code)
-            df = df[(df["date"] >= start_date) & (df["date"] <= end_date)]
-            return [
-                KLine(
-                    date=str(row["date"]),
-                    open=float(row["open"]),
-                    high=float(row["high"]),
-                    low=float(row["low"]),
-                    close=float(row["close"]),
-                    volume=float(row.get("volume", 0)),
-                )
-                for _, row in df.iterrows()
-            ]
+            series = KLineSeries.from_frame(df, "date", "open", "high", "low", "close", "volume")
+            return series.between(start_date, end_date)
         except ImportError:
             logger.warning("akshare not installed, index data unavailable")
-            return []
+            return KLineSeries.empty()
         except Exception as e:
-            logger.error("AKShare index fetch failed for %s: %s", index_code, e)
-            return []
+            raise MarketDataError(f"AKShare index fetch failed for {index_code}: {e}") from e
 
 
 class NullProvider:
     """Fallback when no market data source is available."""
 
-    def get_klines(self, symbol: str, start_date: str, end_date: str, period: str = "daily") -> list[KLine]:
-        return []
+    def get_klines(self, symbol: str, start_date: str, end_date: str, period: str = "daily") -> KLineSeries:
+        return KLineSeries.empty()
+
+    def get_index_klines(self, index_code: str, start_date: str, end_date: str) -> KLineSeries:
+        return KLineSeries.empty()
+
+    def get_adjust_factors(self, symbol: str) -> AdjustFactors | None:
+        from .adjust import AdjustFactors
+
+        return AdjustFactors.empty()
+
 
-    def get_index_klines(self, index_code: str, start_date: str, end_date: str) -> list[KLine]:
-        return []
+def _exchange_prefix(code: str) -> str:
+    """Sina-style exchange prefix of a 6-digit A-share code."""
+    # Beijing: 4xxxxx / 8xxxxx and the newer 92xxxx codes, checked before Shanghai's 9xxxxx B shares.
+    if code[0] in "48" or code.startswith("92"):
+        return "bj"
+    if code[0] in "69":
+        return "sh"
+    return "sz"
 
 
 def get_provider() -> MarketDataProvider:
@@ -0,0 +1,300 @@
+"""Process-wide market data provider registry with warm-up and health tracking.
+
+The provider chain (source -> rate limit -> health tracking -> K-line cache ->
+qfq adjustment -> weekly/monthly resampling) is built once per process instead
+of on every enrichment call, so the akshare import, the SQLite connection and
+the token bucket are shared by all requests. Across processes, the benchmark
+index history and cached K-lines are shared through data_service.shared_cache.
+
+warm_up() runs at API startup on a background thread: it imports the source,
+loads the trading calendar and the default benchmark index, so the first
+analysis request does not pay for them.
+
+Every upstream call goes through TrackedProvider, which records latency and
+failures per source, skips lookups recently found empty or failing (negative
+cache) and fails fast while the source's circuit breaker is open (see
+data_service.resilience). provider_health() exposes the state for the /health
+endpoint.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from app.config import get_kline_cache_path, get_local_data_dir, get_market_data_config, get_shared_cache_dir
+
+from .adjust import AdjustFactors, AdjustingProvider
+from .cache import CachedProvider, get_kline_cache
+from .index_store import get_index_store
+from .local_file import LocalFileProvider
+from .market_data import MarketDataProvider, get_provider
+from .resample import ResamplingProvider
+from .resilience import CLOSED, CircuitBreaker, NegativeCache
+from .shared_cache import SharedSeriesStore, get_shared_store
+from .series import KLineSeries
+from .throttle import RateLimitedProvider, get_bucket
+
+logger = logging.getLogger(__name__)
+
+CN_TZ = ZoneInfo("Asia/Shanghai")
+SLOW_CALL_SECONDS = 10.0
+HEALTH_WINDOW = 50
+FAILED_LOOKUP_TTL_SECONDS = 300
+
+
+class ProviderHealth:
+    """Rolling success/latency record of one upstream source, plus its circuit breaker."""
+
+    def __init__(self, name: str, breaker: CircuitBreaker | None = None) -> None:
+        self.name = name
+        self.breaker = breaker or CircuitBreaker(call_timeout=SLOW_CALL_SECONDS)
+        self._calls: deque[tuple[bool, float]] = deque(maxlen=HEALTH_WINDOW)
+        self._last_error = ""
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """False while the breaker is open (or a half-open probe is already in flight)."""
+        return self.breaker.allow()
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self._calls.append((True, latency))
+        if self.breaker.record(latency):
+            logger.warning("market data source %s marked down: calls exceed %ss", self.name, self.breaker.call_timeout)
+
+    def record_failure(self, latency: float, error: Exception) -> None:
+        with self._lock:
+            self._calls.append((False, latency))
+            self._last_error = str(error)
+        if self.breaker.record(latency, error):
+            logger.warning(
+                "market data source %s marked down after %d failures: %s",
+                self.name, self.breaker.failure_threshold, error,
+            )
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            calls = list(self._calls)
+            last_error = self._last_error
+        breaker = self.breaker.state
+        latencies = [latency for _, latency in calls]
+        avg_latency = sum(latencies) / len(latencies) if latencies else 0.0
+        if breaker != CLOSED:
+            status = "down"
+        elif avg_latency > self.breaker.call_timeout:
+            status = "slow"
+        else:
+            status = "ok"
+        return {
+            "source": self.name,
+            "status": status,
+            "circuit": breaker,
+            "calls": len(calls),
+            "error_rate": round(sum(1 for ok, _ in calls if not ok) / len(calls), 3) if calls else 0.0,
+            "avg_latency_ms": round(avg_latency * 1000, 1),
+            "last_error": last_error,
+        }
+
+
+class TrackedProvider:
+    """MarketDataProvider that records every upstream call in a ProviderHealth.
+
+    Exceptions from the wrapped provider are logged and returned as an empty
+    series, so callers keep the "empty means unavailable" contract. Empty and
+    failed lookups are remembered in a NegativeCache and not retried until they
+    expire; while the source's circuit breaker is open calls fail fast.
+    """
+
+    def __init__(
+        self,
+        provider: MarketDataProvider,
+        health: ProviderHealth,
+        negative_cache: NegativeCache | None = None,
+    ) -> None:
+        self.provider = provider
+        self.health = health
+        self.negative_cache = negative_cache or NegativeCache(ttl=0)
+
+    def get_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        key = ("klines", symbol.strip().upper(), period)
+        return self._call(key, start_date, end_date, self.provider.get_klines, symbol, start_date, end_date, period)
+
+    def get_index_klines(
+        self,
+        index_code: str,
+        start_date: str,
+        end_date: str,
+    ) -> KLineSeries:
+        key = ("index", index_code.strip(), "daily")
+        return self._call(key, start_date, end_date, self.provider.get_index_klines, index_code, start_date, end_date)
+
+    def get_adjust_factors(self, symbol: str) -> AdjustFactors | None:
+        """Factor table from the wrapped provider; None if it failed or the source is down."""
+        if not self.health.available():
+            return None
+        started = time.monotonic()
+        try:
+            factors = self.provider.get_adjust_factors(symbol)
+        except Exception as e:
+            self.health.record_failure(time.monotonic() - started, e)
+            logger.error("%s factor fetch failed for %s: %s", self.health.name, symbol, e)
+            return None
+        self.health.record_success(time.monotonic() - started)
+        return factors
+
+    def _call(self, key: tuple[str, str, str], start_date: str, end_date: str, fetch, *args) -> KLineSeries:
+        if self.negative_cache.contains(key, start_date, end_date) or not self.health.available():
+            return KLineSeries.empty()
+        started = time.monotonic()
+        try:
+            klines = fetch(*args)
+        except Exception as e:
+            self.health.record_failure(time.monotonic() - started, e)
+            self.negative_cache.add(key, start_date, end_date, ttl=min(self.negative_cache.ttl, FAILED_LOOKUP_TTL_SECONDS))
+            logger.error("%s fetch failed for %s: %s", self.health.name, key[1], e)
+            return KLineSeries.empty()
+        self.health.record_success(time.monotonic() - started)
+        # Today's bar may simply not exist yet, so only closed ranges are remembered as empty.
+        if not klines and end_date < _today():
+            self.negative_cache.add(key, start_date, end_date)
+        return klines
+
+
+class ProviderRegistry:
+    """Builds the configured provider chain once and hands out the shared instance."""
+
+    def __init__(self) -> None:
+        self._provider: MarketDataProvider | None = None
+        self._health: dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+        self._warm_up_thread: threading.Thread | None = None
+
+    def get(self) -> MarketDataProvider:
+        with self._lock:
+            if self._provider is None:
+                self._provider = self._build()
+            return self._provider
+
+    def health(self, name: str) -> ProviderHealth:
+        with self._lock:
+            return self._health_locked(name)
+
+    def health_snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            sources = [h.snapshot() for h in self._health.values()]
+        return {
+            "status": "down" if any(s["status"] == "down" for s in sources) else "ok",
+            "warmed_up": self._warm_up_thread is not None and not self._warm_up_thread.is_alive(),
+            "sources": sources,
+        }
+
+    def warm_up(self) -> None:
+        """Start warming the provider chain on a daemon thread (idempotent)."""
+        with self._lock:
+            if self._warm_up_thread is not None:
+                return
+            self._warm_up_thread = threading.Thread(target=self._warm_up, name="market-data-warm-up", daemon=True)
+            self._warm_up_thread.start()
+
+    def reset(self) -> None:
+        """Drop the built chain so the next get() rebuilds it from config."""
+        with self._lock:
+            self._provider = None
+
+    def _build(self) -> MarketDataProvider:
+        shared = _shared_store()
+        # The benchmark index history is shared by all processes on the node.
+        get_index_store().shared = shared
+        # Weekly/monthly bars are resampled from adjusted daily bars; the chain
+        # below caches raw bars and adjustment factors.
+        return ResamplingProvider(AdjustingProvider(self._build_daily(shared)))
+
+    def _build_daily(self, shared: SharedSeriesStore | None) -> MarketDataProvider:
+        cfg = get_market_data_config()
+        if cfg.get("provider") == "local":
+            return LocalFileProvider(get_local_data_dir())
+        provider = get_provider()
+        name = type(provider).__name__
+        rate = float(cfg.get("rate_limit_per_second", 5))
+        if rate > 0:
+            provider = RateLimitedProvider(provider, get_bucket(name, rate, int(cfg.get("rate_limit_burst", 5))))
+        health = self._health_locked(name)
+        health.breaker = CircuitBreaker(
+            failure_threshold=int(cfg.get("circuit_breaker_failures", 3)),
+            reset_after=float(cfg.get("circuit_breaker_reset_seconds", 60)),
+            call_timeout=float(cfg.get("call_timeout_seconds", SLOW_CALL_SECONDS)),
+        )
+        negative_cache = NegativeCache(ttl=float(cfg.get("negative_cache_ttl_seconds", 3600)))
+        provider = TrackedProvider(provider, health, negative_cache)
+        cache_path = get_kline_cache_path()
+        if cache_path is None:
+            return provider
+        return CachedProvider(provider, get_kline_cache(cache_path, shared))
+
+    def _health_locked(self, name: str) -> ProviderHealth:
+        health = self._health.get(name)
+        if health is None:
+            health = self._health[name] = ProviderHealth(name)
+        return health
+
+    def _warm_up(self) -> None:
+        from .enrichment import DEFAULT_BENCHMARK
+        from .trading_calendar import get_trading_calendar
+
+        started = time.monotonic()
+        try:
+            provider = self.get()
+            get_trading_calendar()
+            get_index_store().get_klines(DEFAULT_BENCHMARK, "1990-01-01", "1990-01-01", provider)
+        except Exception as e:
+            logger.warning("market data warm-up failed: %s", e)
+            return
+        logger.info("market data warm-up finished in %.1fs", time.monotonic() - started)
+
+
+_registry = ProviderRegistry()
+
+
+def get_registry() -> ProviderRegistry:
+    """The process-wide ProviderRegistry."""
+    return _registry
+
+
+def get_market_data_provider() -> MarketDataProvider:
+    """The shared, fully wrapped provider for this process."""
+    return _registry.get()
+
+
+def warm_up() -> None:
+    _registry.warm_up()
+
+
+def provider_health() -> dict[str, Any]:
+    return _registry.health_snapshot()
+
+
+def _shared_store() -> SharedSeriesStore | None:
+    root = get_shared_cache_dir()
+    if root is None:
+        return None
+    try:
+        return get_shared_store(root)
+    except OSError as e:
+        logger.warning("shared K-line cache at %s unavailable: %s", root, e)
+        return None
+
+
+def _today() -> str:
+    return datetime.now(CN_TZ).date().isoformat()
@@ -0,0 +1,101 @@
+"""Weekly / monthly bars resampled locally from daily series.
+
+Higher-timeframe bars derive entirely from daily bars, so instead of a
+separate upstream download per period the daily series (usually served from
+the K-line cache) is grouped into calendar weeks or months. Each resampled bar
+is dated on the last trading day of its bucket, like AKShare's weekly and
+monthly data: open of the first bar, high/low extremes, close of the last bar,
+summed volume and turnover.
+"""
+
+from __future__ import annotations
+
+from array import array
+from datetime import date
+
+from .market_data import MarketDataProvider, peek_klines
+from .series import KLineSeries
+
+RESAMPLED_PERIODS = ("weekly", "monthly")
+
+
+def resample(series: KLineSeries, period: str) -> KLineSeries:
+    """Group a daily series into weekly or monthly bars."""
+    if period not in RESAMPLED_PERIODS:
+        raise ValueError(f"unsupported period {period!r}")
+    n = len(series)
+    if not n:
+        return KLineSeries.empty()
+    keys = [_bucket(d, period) for d in series.days]
+    # ends[i] is the exclusive end index of bucket i
+    ends = [i for i in range(1, n) if keys[i] != keys[i - 1]]
+    ends.append(n)
+
+    days, opens, highs, lows, closes, volumes, turnovers = (array("q"), *(array("d") for _ in range(6)))
+    lo = 0
+    for hi in ends:
+        days.append(series.days[hi - 1])
+        opens.append(series.opens[lo])
+        highs.append(max(series.highs[lo:hi]))
+        lows.append(min(series.lows[lo:hi]))
+        closes.append(series.closes[hi - 1])
+        volumes.append(sum(series.volumes[lo:hi]))
+        turnovers.append(sum(series.turnovers[lo:hi]))
+        lo = hi
+    return KLineSeries(days, opens, highs, lows, closes, volumes, turnovers)
+
+
+def period_start(date_str: str, period: str) -> str:
+    """First calendar day of the week (Monday) or month containing date_str."""
+    d = date.fromisoformat(date_str)
+    if period == "weekly":
+        return date.fromordinal(d.toordinal() - d.weekday()).isoformat()
+    return d.replace(day=1).isoformat()
+
+
+class ResamplingProvider:
+    """MarketDataProvider that answers weekly/monthly requests from the wrapped provider's daily bars."""
+
+    def __init__(self, provider: MarketDataProvider) -> None:
+        self.provider = provider
+
+    def get_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        if period not in RESAMPLED_PERIODS:
+            return self.provider.get_klines(symbol, start_date, end_date, period)
+        # Fetch from the start of the first bucket so it is not cut short.
+        daily = self.provider.get_klines(symbol, period_start(start_date, period), end_date, "daily")
+        return resample(daily, period).between(start_date, end_date)
+
+    def peek_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        if period not in RESAMPLED_PERIODS:
+            return peek_klines(self.provider, symbol, start_date, end_date, period)
+        daily = peek_klines(self.provider, symbol, period_start(start_date, period), end_date, "daily")
+        return resample(daily, period).between(start_date, end_date)
+
+    def get_index_klines(
+        self,
+        index_code: str,
+        start_date: str,
+        end_date: str,
+    ) -> KLineSeries:
+        return self.provider.get_index_klines(index_code, start_date, end_date)
+
+
+def _bucket(ordinal: int, period: str) -> int:
+    if period == "weekly":
+        # date.fromordinal(1) is a Monday, so this is the Monday of the week
+        return ordinal - (ordinal - 1) % 7
+    d = date.fromordinal(ordinal)
+    return d.year * 12 + d.month
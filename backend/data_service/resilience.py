@@ -0,0 +1,116 @@
+"""Failure handling for upstream market data lookups.
+
+NegativeCache remembers lookups that came back empty or failed, so a journal
+full of unsupported symbols (HK stocks, futures) does not repeat the same
+doomed fetches on every analysis. Entries expire after a TTL; an entry for a
+date range also answers any request inside that range.
+
+CircuitBreaker stops calling a source after consecutive errors or timeouts:
+while open every call fails fast, after `reset_after` seconds one probe call is
+let through (half-open) and its outcome closes or re-opens the breaker.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class NegativeCache:
+    """TTL set of (kind, code, period) date ranges known to have no data."""
+
+    def __init__(self, ttl: float, max_entries: int = 10000) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict[tuple[str, str, str], list[tuple[str, str, float]]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def contains(self, key: tuple[str, str, str], start_date: str, end_date: str) -> bool:
+        if self.ttl <= 0:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            ranges = self._entries.get(key)
+            if not ranges:
+                return False
+            live = [r for r in ranges if r[2] > now]
+            self._size -= len(ranges) - len(live)
+            if live:
+                self._entries[key] = live
+            else:
+                del self._entries[key]
+            return any(s <= start_date and end_date <= e for s, e, _ in live)
+
+    def add(self, key: tuple[str, str, str], start_date: str, end_date: str, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            if self._size >= self.max_entries:
+                self._entries.clear()
+                self._size = 0
+            self._entries.setdefault(key, []).append((start_date, end_date, time.monotonic() + ttl))
+            self._size += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open probe -> closed/open."""
+
+    def __init__(self, failure_threshold: int = 3, reset_after: float = 60.0, call_timeout: float = 10.0) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_after = reset_after
+        self.call_timeout = call_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now. In half-open state only one probe is allowed."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, latency: float, error: Exception | None = None) -> bool:
+        """Record a call outcome; a call slower than call_timeout counts as a failure.
+
+        Returns True when this outcome opened the breaker.
+        """
+        failed = error is not None or (self.call_timeout > 0 and latency > self.call_timeout)
+        with self._lock:
+            self._probing = False
+            if not failed:
+                self._failures = 0
+                self._opened_at = None
+                return False
+            self._failures += 1
+            was_open = self._opened_at is not None
+            if self._failures >= self.failure_threshold or was_open:
+                self._opened_at = time.monotonic()
+                return not was_open
+            return False
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        return HALF_OPEN if now - self._opened_at >= self.reset_after else OPEN
@@ -0,0 +1,267 @@
+"""K-line data types: single bars (KLine) and columnar series (KLineSeries).
+
+KLineSeries keeps OHLCV as typed `array` columns, built straight from the
+source columns (DataFrame, SQLite rows, ...) without a Python object per bar.
+Slices are zero-copy memoryview windows onto the parent columns, so enrichment
+can cut before/during/after windows out of one fetched span and analysis can
+read them back without copying. Conversion to dicts happens only at the edge
+(JSON snapshots / API responses) via `to_dicts()`.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Iterable, Iterator, Sequence
+
+
+@dataclass
+class KLine:
+    """Single K-line (candlestick) data point."""
+    date: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    turnover: float = 0.0
+
+
+_PRICE_COLUMNS = ("opens", "highs", "lows", "closes", "volumes", "turnovers")
+
+
+class KLineSeries:
+    """Date-sorted OHLCV bars stored column-wise.
+
+    `days` holds proleptic Gregorian ordinals (date.toordinal()) as int64; the
+    price and volume columns are float64. Columns are `array`s, or memoryviews
+    onto a parent series' arrays (slices) or onto a memory-mapped file.
+    """
+
+    __slots__ = ("days", "opens", "highs", "lows", "closes", "volumes", "turnovers", "_base", "_start")
+
+    def __init__(
+        self,
+        days: Sequence[int],
+        opens: Sequence[float],
+        highs: Sequence[float],
+        lows: Sequence[float],
+        closes: Sequence[float],
+        volumes: Sequence[float],
+        turnovers: Sequence[float] | None = None,
+        *,
+        _base: KLineSeries | None = None,
+        _start: int = 0,
+    ) -> None:
+        self.days = days
+        self.opens = opens
+        self.highs = highs
+        self.lows = lows
+        self.closes = closes
+        self.volumes = volumes
+        self.turnovers = turnovers if turnovers is not None else array("d", bytes(8 * len(days)))
+        self._base = _base if _base is not None else self
+        self._start = _start
+
+    # -- construction -------------------------------------------------------
+
+    @classmethod
+    def empty(cls) -> KLineSeries:
+        return cls(array("q"), array("d"), array("d"), array("d"), array("d"), array("d"), array("d"))
+
+    @classmethod
+    def from_columns(
+        cls,
+        dates: Iterable[Any],
+        opens: Iterable[float],
+        highs: Iterable[float],
+        lows: Iterable[float],
+        closes: Iterable[float],
+        volumes: Iterable[float],
+        turnovers: Iterable[float] | None = None,
+    ) -> KLineSeries:
+        """Build from parallel columns; dates may be ISO strings, date or datetime objects."""
+        days = array("q", (_to_ordinal(d) for d in dates))
+        series = cls(
+            days,
+            array("d", opens),
+            array("d", highs),
+            array("d", lows),
+            array("d", closes),
+            array("d", volumes),
+            array("d", turnovers) if turnovers is not None else None,
+        )
+        series._check_lengths()
+        return series
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: Any,
+        date_col: str,
+        open_col: str,
+        high_col: str,
+        low_col: str,
+        close_col: str,
+        volume_col: str,
+        turnover_col: str | None = None,
+    ) -> KLineSeries:
+        """Build from a pandas DataFrame's columns (no per-row iteration)."""
+        def col(name: str) -> list[float]:
+            return df[name].astype(float).tolist()
+
+        return cls.from_columns(
+            df[date_col].tolist(),
+            col(open_col),
+            col(high_col),
+            col(low_col),
+            col(close_col),
+            col(volume_col) if volume_col in df.columns else [0.0] * len(df),
+            col(turnover_col) if turnover_col and turnover_col in df.columns else None,
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> KLineSeries:
+        """Build from (date, open, high, low, close, volume[, turnover]) tuples."""
+        rows = list(rows)
+        if not rows:
+            return cls.empty()
+        columns = list(zip(*rows))
+        return cls.from_columns(*columns[:7])
+
+    @classmethod
+    def from_klines(cls, klines: Iterable[KLine]) -> KLineSeries:
+        return cls.from_rows(
+            (k.date, k.open, k.high, k.low, k.close, k.volume, k.turnover) for k in klines
+        )
+
+    @classmethod
+    def from_dicts(cls, bars: Iterable[dict]) -> KLineSeries:
+        """Inverse of to_dicts(); missing volume/turnover default to 0."""
+        return cls.from_rows(
+            (b["date"], b["open"], b["high"], b["low"], b["close"], b.get("volume", 0), b.get("turnover", 0))
+            for b in bars
+        )
+
+    # -- sequence protocol --------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __bool__(self) -> bool:
+        return len(self.days) > 0
+
+    def __iter__(self) -> Iterator[KLine]:
+        for i in range(len(self.days)):
+            yield self._bar(i)
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            lo, hi, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("KLineSeries slices must be contiguous")
+            return self.view(lo, hi)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("KLineSeries index out of range")
+        return self._bar(index)
+
+    def __add__(self, other: KLineSeries) -> KLineSeries:
+        """Concatenate two series; adjacent views of the same parent join without copying."""
+        if not isinstance(other, KLineSeries):
+            return NotImplemented
+        if not other:
+            return self
+        if not self:
+            return other
+        if self._base is other._base and self._start + len(self) == other._start:
+            return self._base.view(self._start, other._start + len(other))
+        return KLineSeries(
+            *(array(_typecode(name), _chain(getattr(self, name), getattr(other, name))) for name in ("days",) + _PRICE_COLUMNS)
+        )
+
+    # -- views --------------------------------------------------------------
+
+    @property
+    def dates(self) -> list[str]:
+        return [date.fromordinal(d).isoformat() for d in self.days]
+
+    def view(self, lo: int, hi: int) -> KLineSeries:
+        """Zero-copy window [lo, hi) of this series."""
+        lo = max(0, lo)
+        hi = max(lo, min(hi, len(self)))
+        return KLineSeries(
+            *(_window(getattr(self, name), lo, hi) for name in ("days",) + _PRICE_COLUMNS),
+            _base=self._base,
+            _start=self._start + lo,
+        )
+
+    def between(self, start_date: str, end_date: str) -> KLineSeries:
+        """Bars dated within [start_date, end_date] (ISO strings)."""
+        lo = bisect_left(self.days, _to_ordinal(start_date))
+        hi = bisect_right(self.days, _to_ordinal(end_date))
+        return self.view(lo, hi)
+
+    def split(self, entry_date: str, exit_date: str) -> tuple[KLineSeries, KLineSeries, KLineSeries]:
+        """Before-entry / entry..exit / after-exit windows."""
+        lo = bisect_left(self.days, _to_ordinal(entry_date))
+        hi = bisect_right(self.days, _to_ordinal(exit_date))
+        return self.view(0, lo), self.view(lo, hi), self.view(hi, len(self))
+
+    def to_dicts(self) -> list[dict]:
+        return [
+            {
+                "date": date.fromordinal(self.days[i]).isoformat(),
+                "open": self.opens[i],
+                "high": self.highs[i],
+                "low": self.lows[i],
+                "close": self.closes[i],
+                "volume": self.volumes[i],
+            }
+            for i in range(len(self.days))
+        ]
+
+    def _bar(self, i: int) -> KLine:
+        return KLine(
+            date=date.fromordinal(self.days[i]).isoformat(),
+            open=self.opens[i],
+            high=self.highs[i],
+            low=self.lows[i],
+            close=self.closes[i],
+            volume=self.volumes[i],
+            turnover=self.turnovers[i],
+        )
+
+    def _check_lengths(self) -> None:
+        n = len(self.days)
+        for name in _PRICE_COLUMNS:
+            if len(getattr(self, name)) != n:
+                raise ValueError(f"KLineSeries column {name} has {len(getattr(self, name))} values, expected {n}")
+
+    def __repr__(self) -> str:
+        if not self:
+            return "KLineSeries([])"
+        return f"KLineSeries({len(self)} bars, {date.fromordinal(self.days[0])}..{date.fromordinal(self.days[-1])})"
+
+
+def _to_ordinal(value: Any) -> int:
+    if hasattr(value, "toordinal"):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def _typecode(name: str) -> str:
+    return "q" if name == "days" else "d"
+
+
+def _window(column: Sequence, lo: int, hi: int) -> memoryview:
+    view = column if isinstance(column, memoryview) else memoryview(column)
+    return view[lo:hi]
+
+
+def _chain(a: Sequence, b: Sequence) -> Iterator:
+    yield from a
+    yield from b
@@ -9,8 +9,18 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-from .enrichment import enrich_trade as _enrich_one, enrich_trades as _enrich_many
-from .market_data import get_provider
+from app.config import get_market_data_config
+
+from .enrichment import (
+    DEFAULT_BENCHMARK,
+    enrich_trade as _enrich_one,
+    enrich_trades as _enrich_many,
+    enrich_trades_async as _enrich_many_async,
+)
+from .index_store import get_index_store
+from .market_data import AsyncProviderAdapter, MarketDataProvider
+from .series import KLineSeries
+from .registry import get_market_data_provider, provider_health, warm_up  # noqa: F401 - re-exported
 
 logger = logging.getLogger(__name__)
 
@@ -21,11 +31,51 @@ def enrich_trades(trades: list[dict]) -> list[dict]:
     Safe to call even if akshare is not installed - returns trades unchanged
     with empty market_context in that case.
     """
-    provider = get_provider()
-    return _enrich_many(trades, provider)
+    provider = _cached_provider()
+    max_workers = int(get_market_data_config().get("max_workers", 8))
+    return _enrich_many(trades, provider, max_workers=max_workers)
+
+
+async def enrich_trades_async(trades: list[dict], deadline: float | None = None) -> list[dict]:
+    """Async enrich_trades: provider calls run on executor threads, fanned out with asyncio.gather.
+
+    deadline (seconds) bounds the wait on upstream data; it defaults to
+    market_data.enrich_deadline_seconds (null = wait for every fetch).
+    Trades whose data did not arrive in time are enriched from cached bars.
+    """
+    cfg = get_market_data_config()
+    provider = AsyncProviderAdapter(_cached_provider())
+    max_concurrency = int(cfg.get("max_workers", 8))
+    if deadline is None and cfg.get("enrich_deadline_seconds") is not None:
+        deadline = float(cfg["enrich_deadline_seconds"])
+    return await _enrich_many_async(trades, provider, max_concurrency=max_concurrency, deadline=deadline)
 
 
 def enrich_single_trade(trade: dict) -> dict:
     """Enrich a single trade dict with market context data."""
-    provider = get_provider()
+    provider = _cached_provider()
     return _enrich_one(trade, provider)
+
+
+def benchmark_returns(
+    intervals: list[tuple[str, str]],
+    index_code: str = DEFAULT_BENCHMARK,
+    fetch: bool = True,
+) -> list[float | None]:
+    """Benchmark index return for each (start_date, end_date) interval in one call.
+
+    fetch=False only uses the index data already loaded on this node (no
+    network wait), e.g. for dashboard requests.
+    """
+    provider = _cached_provider()  # also attaches the shared index cache
+    return get_index_store().benchmark_returns(index_code, intervals, provider if fetch else None)
+
+
+def get_klines(symbol: str, start_date: str, end_date: str, period: str = "daily") -> KLineSeries:
+    """Daily, weekly or monthly K-lines; higher timeframes are resampled from cached daily bars."""
+    return _cached_provider().get_klines(symbol, start_date, end_date, period)
+
+
+def _cached_provider() -> MarketDataProvider:
+    """The process-wide provider chain (see data_service.registry)."""
+    return get_market_data_provider()
@@ -0,0 +1,164 @@
+"""Cross-process store of read-only K-line series in memory-mapped files.
+
+Each uvicorn worker (and the agent worker) would otherwise hold its own copy
+of the benchmark index history and hot K-line series, and download the index
+on its own. The shared store keeps series in one directory, in local_file's
+memory-mappable .bin format; every process on the node maps the same files, so
+bars are read zero-copy from the shared page cache (point the directory at
+/dev/shm to keep it in RAM).
+
+    <root>/directory.json      key -> {"file", "refreshed_on", "ranges"}
+    <root>/<name>.<ver>.bin    one immutable segment per published version
+    <root>/locks/<name>.lock   flock held while a process refreshes that key
+
+Segments are never modified in place: publishing writes a new file and swaps
+the directory entry atomically, so a reader's mapping always stays consistent.
+Refreshes are single-flight across processes: the first process to take a
+key's lock fetches and publishes, the others wait for it and read its result.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+from .local_file import read_series, write_series
+from .series import KLineSeries
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only exclude threads of this process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_DIRECTORY = "directory.json"
+
+
+@dataclass(frozen=True)
+class SharedSeries:
+    """A published series (memory-mapped), the day it was refreshed and the date ranges it covers."""
+
+    series: KLineSeries
+    refreshed_on: str = ""
+    ranges: list[tuple[str, str]] = field(default_factory=list)
+
+    def covers(self, start_date: str, end_date: str) -> bool:
+        return any(s <= start_date and end_date <= e for s, e in self.ranges)
+
+
+class SharedSeriesStore:
+    """Directory of memory-mapped series shared by all processes on a node."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        (self.root / "locks").mkdir(parents=True, exist_ok=True)
+        self._directory: dict[str, dict] = {}
+        self._directory_version: tuple[int, int] | None = None
+        self._mapped: dict[str, tuple[str, SharedSeries]] = {}
+        self._lock = threading.Lock()
+        self._thread_locks: dict[str, threading.Lock] = {}
+
+    def get(self, key: str) -> SharedSeries | None:
+        """Latest published version of key, or None."""
+        with self._lock:
+            entry = self._read_directory().get(key)
+            if entry is None:
+                return None
+            mapped = self._mapped.get(key)
+            if mapped is not None and mapped[0] == entry["file"]:
+                return mapped[1]
+        try:
+            series = read_series(self.root / entry["file"])
+        except (OSError, ValueError) as e:
+            # Replaced and cleaned up between reading the directory and mapping it.
+            logger.debug("shared series %s unavailable: %s", key, e)
+            return None
+        shared = SharedSeries(series, entry.get("refreshed_on", ""), [tuple(r) for r in entry.get("ranges", [])])
+        with self._lock:
+            self._mapped[key] = (entry["file"], shared)
+        return shared
+
+    def publish(
+        self,
+        key: str,
+        series: KLineSeries,
+        refreshed_on: str = "",
+        ranges: list[tuple[str, str]] | None = None,
+    ) -> None:
+        """Write series as a new segment and make it the current version of key."""
+        name = f"{_file_name(key)}.{time.time_ns():x}.bin"
+        write_series(self.root / name, series)
+        with self._file_lock("_directory"):
+            directory = self._load_directory()
+            previous = directory.get(key)
+            directory[key] = {"file": name, "refreshed_on": refreshed_on, "ranges": [list(r) for r in ranges or []]}
+            tmp = self.root / (_DIRECTORY + ".tmp")
+            tmp.write_text(json.dumps(directory), encoding="utf-8")
+            os.replace(tmp, self.root / _DIRECTORY)
+        if previous is not None:
+            # Existing mappings stay valid after unlink on POSIX; elsewhere the file lingers.
+            try:
+                (self.root / previous["file"]).unlink()
+            except OSError:
+                pass
+
+    @contextmanager
+    def refreshing(self, key: str) -> Iterator[None]:
+        """Hold key's cross-process refresh lock (blocks while another process refreshes it)."""
+        with self._file_lock(_file_name(key)):
+            yield
+
+    @contextmanager
+    def _file_lock(self, name: str) -> Iterator[None]:
+        with self._lock:
+            thread_lock = self._thread_locks.setdefault(name, threading.Lock())
+        with thread_lock, open(self.root / "locks" / f"{name}.lock", "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def _read_directory(self) -> dict[str, dict]:
+        """Cached directory, re-read only when the file changed. Caller holds _lock."""
+        try:
+            st = (self.root / _DIRECTORY).stat()
+        except OSError:
+            return {}
+        # Every publish replaces the file, so the inode changes even within one mtime tick.
+        version = (st.st_ino, st.st_mtime_ns)
+        if version != self._directory_version:
+            self._directory = self._load_directory()
+            self._directory_version = version
+        return self._directory
+
+    def _load_directory(self) -> dict[str, dict]:
+        try:
+            return json.loads((self.root / _DIRECTORY).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+
+_stores: dict[Path, SharedSeriesStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_shared_store(root: str | Path) -> SharedSeriesStore:
+    """Process-wide SharedSeriesStore for a directory."""
+    key = Path(root).resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SharedSeriesStore(key)
+        return store
+
+
+def _file_name(key: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", key)
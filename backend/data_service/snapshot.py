@@ -0,0 +1,32 @@
+"""CLI: snapshot live market data into LocalFileProvider's on-disk layout.
+
+    python -m data_service.snapshot --out data/market --start 2020-01-01 \\
+        --end 2024-12-31 --index sh000001 000001 600519
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from datetime import date
+
+from .local_file import snapshot
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snapshot market data into LocalFileProvider format")
+    parser.add_argument("symbols", nargs="*", help="stock symbols, e.g. 000001 600519")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--start", required=True, help="start date YYYY-MM-DD")
+    parser.add_argument("--end", default=date.today().isoformat(), help="end date YYYY-MM-DD")
+    parser.add_argument("--index", action="append", default=[], help="index code, e.g. sh000001 (repeatable)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    counts = snapshot(args.out, args.symbols, args.start, args.end, index_codes=args.index)
+    for code, n in counts.items():
+        print(f"{code}: {n} bars")
+
+
+if __name__ == "__main__":
+    main()
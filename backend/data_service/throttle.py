@@ -0,0 +1,85 @@
+"""Rate limiting for upstream market data sources.
+
+Free data sources (AKShare scrapes public endpoints) throttle or ban clients
+that burst too many requests, so concurrent enrichment goes through a
+token bucket per provider.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from .adjust import AdjustFactors
+from .market_data import MarketDataProvider
+from .series import KLineSeries
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` stored."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimitedProvider:
+    """MarketDataProvider that takes a token from a bucket before every upstream call."""
+
+    def __init__(self, provider: MarketDataProvider, bucket: TokenBucket) -> None:
+        self.provider = provider
+        self.bucket = bucket
+
+    def get_klines(
+        self,
+        symbol: str,
+        start_date: str,
+        end_date: str,
+        period: str = "daily",
+    ) -> KLineSeries:
+        self.bucket.acquire()
+        return self.provider.get_klines(symbol, start_date, end_date, period)
+
+    def get_index_klines(
+        self,
+        index_code: str,
+        start_date: str,
+        end_date: str,
+    ) -> KLineSeries:
+        self.bucket.acquire()
+        return self.provider.get_index_klines(index_code, start_date, end_date)
+
+    def get_adjust_factors(self, symbol: str) -> AdjustFactors | None:
+        self.bucket.acquire()
+        return self.provider.get_adjust_factors(symbol)
+
+
+_buckets: dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(name: str, rate: float, burst: int = 1) -> TokenBucket:
+    """Process-wide bucket per provider name, so all callers share one budget."""
+    with _buckets_lock:
+        bucket = _buckets.get(name)
+        if bucket is None or bucket.rate != rate or bucket.burst != max(1, burst):
+            bucket = _buckets[name] = TokenBucket(rate, burst)
+        return bucket
@@ -0,0 +1,111 @@
+"""A-share trading calendar - lets enrichment ask for N trading days, not calendar days.
+
+Calendar-day offsets give a variable number of bars (weekends, Spring
+Festival, National Day), so windows around holidays come back short. The
+calendar is loaded once per process from AKShare (tool_trade_date_hist_sina)
+and held as a sorted array of date ordinals. Dates outside the loaded range,
+or when the source is unavailable, fall back to Monday-Friday stepping.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+RETRY_AFTER_FAILURE_SECONDS = 300
+
+
+class TradingCalendar:
+    """Sorted trading days with bar-count offsets."""
+
+    def __init__(self, trade_dates: Iterable[date]) -> None:
+        self.days = array("q", sorted({d.toordinal() for d in trade_dates}))
+
+    def is_trading_day(self, date_str: str) -> bool:
+        if not self._covers(_ordinal(date_str)):
+            return date.fromisoformat(date_str).weekday() < 5
+        i = bisect_left(self.days, _ordinal(date_str))
+        return i < len(self.days) and self.days[i] == _ordinal(date_str)
+
+    def has_trading_day(self, start_date: str, end_date: str) -> bool:
+        """Whether [start_date, end_date] holds at least one trading day."""
+        lo, hi = _ordinal(start_date), _ordinal(end_date)
+        if self._covers(lo) and self._covers(hi):
+            i = bisect_left(self.days, lo)
+            return i < len(self.days) and self.days[i] <= hi
+        return any(date.fromordinal(d).weekday() < 5 for d in range(lo, min(hi, lo + 6) + 1))
+
+    def shift(self, date_str: str, bars: int) -> str:
+        """Trading day `bars` sessions away from date_str.
+
+        bars < 0: the |bars|-th trading day strictly before date_str.
+        bars > 0: the bars-th trading day strictly after date_str.
+        """
+        d = _ordinal(date_str)
+        if bars == 0 or not self._covers(d):
+            return _weekday_shift(date_str, bars)
+        if bars < 0:
+            i = bisect_left(self.days, d) + bars
+            if i < 0:
+                return _weekday_shift(date.fromordinal(self.days[0]).isoformat(), i)
+        else:
+            i = bisect_right(self.days, d) + bars - 1
+            if i >= len(self.days):
+                return _weekday_shift(date.fromordinal(self.days[-1]).isoformat(), i - len(self.days) + 1)
+        return date.fromordinal(self.days[i]).isoformat()
+
+    def _covers(self, ordinal: int) -> bool:
+        return bool(self.days) and self.days[0] <= ordinal <= self.days[-1]
+
+
+_calendar: TradingCalendar | None = None
+_loaded_at = 0.0
+_calendar_lock = threading.Lock()
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """Process-wide A-share calendar, loaded on first use (retried later if the source failed)."""
+    global _calendar, _loaded_at
+    with _calendar_lock:
+        stale = _calendar is not None and not _calendar.days and time.monotonic() - _loaded_at > RETRY_AFTER_FAILURE_SECONDS
+        if _calendar is None or stale:
+            _calendar = TradingCalendar(_load_trade_dates())
+            _loaded_at = time.monotonic()
+        return _calendar
+
+
+def _load_trade_dates() -> list[date]:
+    try:
+        import akshare as ak
+
+        df = ak.tool_trade_date_hist_sina()
+        return [d if isinstance(d, date) else date.fromisoformat(str(d)[:10]) for d in df["trade_date"].tolist()]
+    except ImportError:
+        logger.info("akshare not available, trading calendar falls back to weekdays")
+        return []
+    except Exception as e:
+        logger.warning("trading calendar fetch failed, falling back to weekdays: %s", e)
+        return []
+
+
+def _ordinal(date_str: str) -> int:
+    return date.fromisoformat(date_str).toordinal()
+
+
+def _weekday_shift(date_str: str, bars: int) -> str:
+    """Step `bars` Monday-Friday days away from date_str."""
+    d = date.fromisoformat(date_str)
+    step = 1 if bars > 0 else -1
+    remaining = abs(bars)
+    while remaining:
+        d += timedelta(days=step)
+        if d.weekday() < 5:
+            remaining -= 1
+    return d.isoformat()
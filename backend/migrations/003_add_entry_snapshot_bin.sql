@@ -0,0 +1,4 @@
+-- Migration: add entry_snapshot_bin to trades (compact binary market snapshot, see data_service/codec.py)
+-- New snapshots are written here; entry_snapshot_json is kept for rows recorded before this migration.
+
+ALTER TABLE trades ADD COLUMN IF NOT EXISTS entry_snapshot_bin BYTEA;
@@ -0,0 +1,10 @@
+-- Migration: add trade_metric_buckets (incremental metric accumulators, see app/metrics.py)
+-- Buckets are built lazily from trades on first read, so no backfill is needed.
+
+CREATE TABLE IF NOT EXISTS trade_metric_buckets (
+    user_id VARCHAR NOT NULL,
+    bucket_start DATE NOT NULL,
+    data_json TEXT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (user_id, bucket_start)
+);